@@ -0,0 +1,167 @@
+"""
+ALSA mixer
+==========
+
+A minimal ctypes binding to libasound's simple mixer interface, so that the volume
+widget can read and set a mixer element without spawning ``amixer``, and can be told
+about changes made by anything else through the mixer's poll descriptors.
+
+Percentages are of the element's raw volume range, which is what ``amixer`` uses by
+default.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+
+SND_MIXER_SCHN_FRONT_LEFT = 0
+
+
+class AlsaError(Exception):
+    pass
+
+
+class _PollFD(ctypes.Structure):
+    _fields_ = [
+        ("fd", ctypes.c_int),
+        ("events", ctypes.c_short),
+        ("revents", ctypes.c_short),
+    ]
+
+
+def _load_libasound() -> ctypes.CDLL:
+    name = ctypes.util.find_library("asound")
+    if name is None:
+        raise AlsaError("libasound could not be found")
+    lib = ctypes.CDLL(name)
+
+    p = ctypes.c_void_p
+    lib.snd_mixer_open.argtypes = [ctypes.POINTER(p), ctypes.c_int]
+    lib.snd_mixer_attach.argtypes = [p, ctypes.c_char_p]
+    lib.snd_mixer_selem_register.argtypes = [p, p, p]
+    lib.snd_mixer_load.argtypes = [p]
+    lib.snd_mixer_close.argtypes = [p]
+    lib.snd_mixer_handle_events.argtypes = [p]
+    lib.snd_mixer_poll_descriptors_count.argtypes = [p]
+    lib.snd_mixer_poll_descriptors.argtypes = [p, ctypes.POINTER(_PollFD), ctypes.c_uint]
+    lib.snd_mixer_selem_id_malloc.argtypes = [ctypes.POINTER(p)]
+    lib.snd_mixer_selem_id_free.argtypes = [p]
+    lib.snd_mixer_selem_id_set_index.argtypes = [p, ctypes.c_uint]
+    lib.snd_mixer_selem_id_set_name.argtypes = [p, ctypes.c_char_p]
+    lib.snd_mixer_find_selem.argtypes = [p, p]
+    lib.snd_mixer_find_selem.restype = p
+    lib.snd_mixer_selem_get_playback_volume_range.argtypes = [
+        p,
+        ctypes.POINTER(ctypes.c_long),
+        ctypes.POINTER(ctypes.c_long),
+    ]
+    lib.snd_mixer_selem_get_playback_volume.argtypes = [
+        p,
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_long),
+    ]
+    lib.snd_mixer_selem_set_playback_volume_all.argtypes = [p, ctypes.c_long]
+    lib.snd_mixer_selem_has_playback_switch.argtypes = [p]
+    lib.snd_mixer_selem_get_playback_switch.argtypes = [
+        p,
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_int),
+    ]
+    lib.snd_mixer_selem_set_playback_switch_all.argtypes = [p, ctypes.c_int]
+    return lib
+
+
+class Mixer:
+    """A playback element, e.g. "PCM", on an ALSA card, e.g. "PCH"."""
+
+    def __init__(self, card: str, element: str):
+        self._lib = _load_libasound()
+        self._handle = ctypes.c_void_p()
+        self._check(self._lib.snd_mixer_open(ctypes.byref(self._handle), 0), "open")
+
+        try:
+            self._check(
+                self._lib.snd_mixer_attach(self._handle, f"hw:{card}".encode()), "attach"
+            )
+            self._check(self._lib.snd_mixer_selem_register(self._handle, None, None), "register")
+            self._check(self._lib.snd_mixer_load(self._handle), "load")
+
+            sid = ctypes.c_void_p()
+            self._check(self._lib.snd_mixer_selem_id_malloc(ctypes.byref(sid)), "malloc")
+            self._lib.snd_mixer_selem_id_set_index(sid, 0)
+            self._lib.snd_mixer_selem_id_set_name(sid, element.encode())
+            self._elem = self._lib.snd_mixer_find_selem(self._handle, sid)
+            self._lib.snd_mixer_selem_id_free(sid)
+            if not self._elem:
+                raise AlsaError(f"No mixer element {element} on card {card}")
+
+            low = ctypes.c_long()
+            high = ctypes.c_long()
+            self._lib.snd_mixer_selem_get_playback_volume_range(
+                self._elem, ctypes.byref(low), ctypes.byref(high)
+            )
+            self._min = low.value
+            self._max = high.value
+            self._has_switch = bool(self._lib.snd_mixer_selem_has_playback_switch(self._elem))
+        except AlsaError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _check(ret: int, what: str) -> None:
+        if ret < 0:
+            raise AlsaError(f"snd_mixer {what} failed with error {ret}")
+
+    def poll_fds(self) -> list[int]:
+        """The file descriptors that become readable when the mixer changes."""
+        count = self._lib.snd_mixer_poll_descriptors_count(self._handle)
+        if count <= 0:
+            return []
+        pfds = (_PollFD * count)()
+        count = self._lib.snd_mixer_poll_descriptors(self._handle, pfds, count)
+        return [pfds[i].fd for i in range(max(count, 0))]
+
+    def handle_events(self) -> None:
+        """Clear pending events so that the element's values are refreshed."""
+        self._lib.snd_mixer_handle_events(self._handle)
+
+    def _get_raw(self) -> int:
+        value = ctypes.c_long()
+        self._lib.snd_mixer_selem_get_playback_volume(
+            self._elem, SND_MIXER_SCHN_FRONT_LEFT, ctypes.byref(value)
+        )
+        return value.value
+
+    @property
+    def muted(self) -> bool:
+        if not self._has_switch:
+            return False
+        value = ctypes.c_int()
+        self._lib.snd_mixer_selem_get_playback_switch(
+            self._elem, SND_MIXER_SCHN_FRONT_LEFT, ctypes.byref(value)
+        )
+        return not value.value
+
+    def get_volume(self) -> int:
+        """The volume as a percentage."""
+        span = self._max - self._min
+        if span <= 0:
+            return 0
+        return round((self._get_raw() - self._min) * 100 / span)
+
+    def change_volume(self, percent: int) -> None:
+        """Raise or lower the volume by a percentage of the full range."""
+        span = self._max - self._min
+        raw = self._get_raw() + round(percent * span / 100)
+        raw = max(self._min, min(self._max, raw))
+        self._lib.snd_mixer_selem_set_playback_volume_all(self._elem, raw)
+
+    def toggle_mute(self) -> None:
+        if self._has_switch:
+            self._lib.snd_mixer_selem_set_playback_switch_all(self._elem, int(self.muted))
+
+    def close(self) -> None:
+        if self._handle:
+            self._lib.snd_mixer_close(self._handle)
+            self._handle = ctypes.c_void_p()
@@ -0,0 +1,124 @@
+"""
+Backlight
+=========
+
+Reads and sets a backlight device's brightness directly through sysfs. The brightness
+file is held open for writing, and actual_brightness is watched with inotify so that
+changes made by other tools or by the hardware are noticed without polling.
+
+The sysfs root can be given so this can be pointed at a fake directory tree.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from libqtile.log_utils import logger
+
+import inotify
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+BACKLIGHT_DIR = "/sys/class/backlight"
+
+
+def find_device(root: str = BACKLIGHT_DIR) -> str | None:
+    """The name of the last backlight device under root, if there are any."""
+    try:
+        devices = sorted(os.listdir(root))
+    except FileNotFoundError:
+        return None
+    return devices[-1] if devices else None
+
+
+class BacklightDevice:
+    """
+    A backlight device under root. If no name is given, the device is found with
+    ``find_device``, and it is found again each time ``open`` is called.
+    ``on_change`` is called when actual_brightness changes.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[], None],
+        name: str | None = None,
+        root: str = BACKLIGHT_DIR,
+    ):
+        self.on_change = on_change
+        self.root = root
+        self._name = name
+        self.name: str | None = None
+        self.max_brightness = 0
+        self._read_fd = -1
+        self._write_fd = -1
+        self._inotify: inotify.Inotify | None = None
+        self._wd = -1
+
+    def _path(self, filename: str) -> str:
+        assert self.name is not None
+        return os.path.join(self.root, self.name, filename)
+
+    def open(self) -> None:
+        """(Re)open the device, e.g. after devices have been added or removed."""
+        self.close()
+        self.name = self._name or find_device(self.root)
+        if self.name is None:
+            logger.warning("No backlight device found in %s", self.root)
+            return
+
+        try:
+            with open(self._path("max_brightness")) as f:
+                self.max_brightness = int(f.read().strip())
+            self._read_fd = os.open(self._path("actual_brightness"), os.O_RDONLY)
+        except (FileNotFoundError, ValueError):
+            logger.exception("Backlight device %s could not be read", self.name)
+            self.close()
+            return
+
+        try:
+            self._write_fd = os.open(self._path("brightness"), os.O_WRONLY)
+        except PermissionError:
+            logger.warning(
+                "Cannot set brightness: no write permission for %s",
+                self._path("brightness"),
+            )
+
+        if self._inotify is None:
+            self._inotify = inotify.Inotify(self._inotify_event)
+        self._wd = self._inotify.add_watch(
+            self._path("actual_brightness"), inotify.IN_MODIFY
+        )
+
+    def _inotify_event(self, wd: int, _mask: int, _name: str) -> None:
+        if wd == self._wd:
+            self.on_change()
+
+    def get_fraction(self) -> float:
+        """The current brightness as a fraction of the maximum."""
+        if self._read_fd < 0 or self.max_brightness <= 0:
+            raise RuntimeError("No backlight device")
+        return int(os.pread(self._read_fd, 32, 0).strip()) / self.max_brightness
+
+    def set_percent(self, percent: float) -> None:
+        if self._write_fd < 0:
+            return
+        value = round(self.max_brightness * percent / 100)
+        os.pwrite(self._write_fd, str(value).encode(), 0)
+
+    def close(self) -> None:
+        if self._inotify is not None and self._wd >= 0:
+            self._inotify.rm_watch(self._wd)
+        self._wd = -1
+        for fd in (self._read_fd, self._write_fd):
+            if fd >= 0:
+                os.close(fd)
+        self._read_fd = self._write_fd = -1
+        self.name = None
+
+    def finalize(self) -> None:
+        self.close()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,101 @@
+"""
+Battery widget
+==============
+
+Kept out of config.py so that ``libqtile.widget.battery`` is only imported once the bar
+is first drawn (see ``lazy_widget``).
+"""
+
+from __future__ import annotations
+
+from libqtile.log_utils import logger
+from libqtile.widget.battery import Battery, BatteryState
+
+import uevent
+from mirror import RenderOnce
+
+
+class MyBattery(RenderOnce, Battery):
+    """
+    This is basically the Battery widget except it uses some icons, and if you click it
+    it will show the percentage numerically for 1 second.
+
+    It updates when the kernel sends a power_supply uevent, e.g. when the charger is
+    plugged in, and only polls slowly to keep up with the charge percentage.
+    """
+
+    defaults = [
+        ("fallback_interval", 300, "Seconds between updates when uevents are received"),
+    ]
+
+    def __init__(self, **config):
+        Battery.__init__(self, **config)
+        self.add_defaults(MyBattery.defaults)
+        self._uevents = uevent.UeventMonitor("power_supply", self._power_supply_changed)
+        self._update_pending = False
+
+    def _configure(self, qtile, bar):
+        Battery._configure(self, qtile, bar)
+        # The widget is configured again when its bar is, or when it is mirrored
+        if self._uevents.started:
+            return
+        try:
+            self._uevents.start()
+        except OSError:
+            logger.exception("Could not listen for uevents, polling the battery instead")
+        else:
+            self.update_interval = max(self.update_interval, self.fallback_interval)
+
+    def finalize(self):
+        self._uevents.stop()
+        Battery.finalize(self)
+
+    def _power_supply_changed(self, _env):
+        # The battery and the charger usually change together, so update once for both
+        if not self._update_pending:
+            self._update_pending = True
+            self.timeout_add(0.1, self._update_now)
+
+    def _update_now(self):
+        self._update_pending = False
+        self.force_update()
+
+    def build_string(self, status):
+        if self.layout is not None:
+            self.layout.colour = self.foreground
+            if (
+                status.state == BatteryState.DISCHARGING
+                and status.percent < self.low_percentage
+            ):
+                self.background = self.low_background
+            else:
+                self.background = self.normal_background
+        if status.state == BatteryState.DISCHARGING:
+            if status.percent > 0.75:
+                char = ""
+            elif status.percent > 0.45:
+                char = ""
+            elif status.percent > 0.25:
+                char = ""
+            else:
+                char = ""
+        elif status.percent >= 1 or status.state == BatteryState.FULL:
+            char = ""
+        elif status.state == BatteryState.EMPTY or (
+            status.state == BatteryState.UNKNOWN and status.percent == 0
+        ):
+            char = ""
+        else:
+            char = ""
+        return self.format.format(char=char, percent=status.percent)
+
+    def restore(self):
+        self.format = "{char}"
+        self.font = "Font Awesome 5 Free"
+        self.force_update()
+
+    def button_press(self, x, y, button):
+        self.format = "{percent:2.0%}"
+        self.font = "TamzenForPowerline Bold"
+        self.force_update()
+        self.timeout_add(1, self.restore)
@@ -0,0 +1,84 @@
+"""
+Backlight widget
+================
+
+The bar's backlight widget, built on the sysfs device in ``backlight``. The bar creates
+it lazily, so key bindings refer to it by name and pass ``"up"`` or ``"down"`` rather
+than a ``ChangeDirection``.
+"""
+
+from __future__ import annotations
+
+from libqtile.log_utils import logger
+from libqtile.widget.backlight import Backlight, ChangeDirection
+
+import backlight
+import uevent
+from coalesce import Coalescer
+from mirror import RenderOnce
+
+
+class MyBacklight(RenderOnce, Backlight):
+    """
+    Backlight widget that sums up changes requested in quick succession, e.g. by holding
+    down a key, and sets the brightness once for them.
+
+    The device is read and written in-process through sysfs, changes made elsewhere are
+    picked up with inotify, and the device is looked for again when backlight devices
+    are added or removed. If backlight_name isn't given, the last device found is used.
+    """
+
+    def __init__(self, **config):
+        Backlight.__init__(self, **config)
+        self._backlight_changes = Coalescer(self._change_by)
+        self._device = backlight.BacklightDevice(
+            self._brightness_changed, name=config.get("backlight_name")
+        )
+        self._uevents = uevent.UeventMonitor("backlight", self._devices_changed)
+
+    def _configure(self, qtile, bar):
+        self._device.open()
+        Backlight._configure(self, qtile, bar)
+        # The widget is configured again when its bar is, or when it is mirrored
+        if self._uevents.started:
+            return
+        try:
+            self._uevents.start()
+        except OSError:
+            logger.exception("Could not listen for backlight devices being added")
+
+    def finalize(self):
+        self._backlight_changes.cancel()
+        self._uevents.stop()
+        self._device.finalize()
+        Backlight.finalize(self)
+
+    def _get_info(self):
+        return self._device.get_fraction()
+
+    def _change_backlight(self, value):
+        self._device.set_percent(value)
+
+    def _brightness_changed(self):
+        self.update(self.poll())
+
+    def _devices_changed(self, env):
+        if env.get("ACTION") in ("add", "remove"):
+            self._device.open()
+            self.update(self.poll())
+
+    def _change_by(self, delta):
+        try:
+            now = self._get_info() * 100
+        except RuntimeError:
+            return
+        new = max(self.min_brightness, min(now + delta, 100))
+        if new != now:
+            self._change_backlight(new)
+
+    def change_backlight(self, direction, step=None):
+        # Key bindings can pass "up" or "down" so the config needn't import this module
+        if not step:
+            step = self.step
+        up = direction in (ChangeDirection.UP, "up")
+        self._backlight_changes.add(step if up else -step)
@@ -0,0 +1,48 @@
+"""
+Coalescing repeated commands
+============================
+
+Holding down a key that is bound to e.g. ``increase_vol`` calls that command at the
+keyboard's repeat rate. A ``Coalescer`` applies the first change straight away and then
+sums any changes requested during the following window, applying them as one adjustment
+when the window ends. Holding a key then gives a steady ramp, and nothing is left queued
+up once it is released.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+
+class Coalescer:
+    def __init__(self, apply: Callable[[float], None], window: float = 0.1):
+        self._apply = apply
+        self.window = window
+        self._pending: float = 0
+        self._handle: asyncio.TimerHandle | None = None
+
+    def add(self, delta: float) -> None:
+        """Request a change of ``delta``."""
+        if self._handle is None:
+            self._apply(delta)
+            self._handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        else:
+            self._pending += delta
+
+    def _flush(self) -> None:
+        self._handle = None
+        if self._pending:
+            delta = self._pending
+            self._pending = 0
+            self.add(delta)
+
+    def cancel(self) -> None:
+        """Drop any pending changes."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending = 0
@@ -5,21 +5,36 @@ Qtile main config file
 
 from __future__ import annotations
 
-import importlib
+import asyncio
+import functools
 import os
-import re
 import subprocess
-import sys
 from typing import TYPE_CHECKING
 
-from libqtile import bar, hook, layout, qtile, utils, widget
+from libqtile import bar, layout, qtile, utils, widget
 from libqtile.backend import base
-from libqtile.config import Click, Drag, Key, Match, Screen
+from libqtile.config import Click, Drag, Screen
 from libqtile.lazy import lazy
-from libqtile.widget.backlight import ChangeDirection
-from libqtile.widget.battery import Battery, BatteryState
-
-import qtile_extras.widget as widget_extras
+from libqtile.log_utils import logger
+
+# Config imports. reloader goes first: it times the others, and when the config is
+# reloaded, it only reloads those that have changed.
+import reloader
+import alsa
+import hooks
+import keymap
+import ticker
+import traverse
+from coalesce import Coalescer
+from damage import DamageBar
+from lazy_widget import LazyWidget
+from mirror import RenderOnce
+from partition import Partition
+from scrolling import StripScroll
+from toggle_debug import toggle_debug
+from scratchpad import keys_scratchpad, scratchpad
+from power_menu import destroy_power_menu, keys_power_menu
+from float_rules import Floating, float_rules
 
 assert qtile is not None
 
@@ -29,34 +44,17 @@ if TYPE_CHECKING:
     from libqtile.core.manager import Qtile
 
 
-# Config imports
-def reload(module):
-    if module in sys.modules:
-        importlib.reload(sys.modules[module])
-
-
-import traverse
-from toggle_debug import toggle_debug
-
 use_tags = False
 
 if use_tags:
-    reload("tags")
     from tags import groups, keys_group
+    partition = Partition([g.name for g in groups])
 else:
-    reload("groups")
-    from groups import groups, keys_group
-
-reload("scratchpad")
-from scratchpad import keys_scratchpad, scratchpad
-
-reload("power_menu")
-from power_menu import keys_power_menu
+    from groups import groups, keys_group, partition
 
 IS_WAYLAND: bool = qtile.core.name == "wayland"
 IS_XEPHYR: bool = int(os.environ.get("QTILE_XEPHYR", 0)) > 0
 
-reload(qtile.core.name)
 if IS_WAYLAND:
     from wayland import keys_backend, term, wl_input_rules, wl_shadows  # noqa: F401
 else:
@@ -111,6 +109,9 @@ my_keys.extend(keys_group)
 my_keys.extend(keys_scratchpad)
 my_keys.extend(keys_power_menu)
 
+# The power menu's popup was built by the previous config
+destroy_power_menu()
+
 
 def float_to_front(qtile: Qtile) -> None:
     """Bring all floating windows of the group to front"""
@@ -171,25 +172,25 @@ my_keys.extend(
         (
             [],
             "XF86MonBrightnessUp",
-            lazy.widget["backlight"].change_backlight(ChangeDirection.UP, 3),
+            lazy.widget["backlight"].change_backlight("up", 3),
             "Increase backlight",
         ),
         (
             [],
             "XF86MonBrightnessDown",
-            lazy.widget["backlight"].change_backlight(ChangeDirection.DOWN, 3),
+            lazy.widget["backlight"].change_backlight("down", 3),
             "Decrease backlight",
         ),
         (
             [mod],
             "F6",
-            lazy.widget["backlight"].change_backlight(ChangeDirection.UP, 3),
+            lazy.widget["backlight"].change_backlight("up", 3),
             "Increase backlight",
         ),
         (
             [mod],
             "F5",
-            lazy.widget["backlight"].change_backlight(ChangeDirection.DOWN, 3),
+            lazy.widget["backlight"].change_backlight("down", 3),
             "Decrease backlight",
         ),
         # Music control
@@ -299,12 +300,9 @@ if IS_WAYLAND:
     else:
 
         def _slide(qtile):
-            groups = qtile.groups
-            if len(qtile.screens) > 1:
-                if qtile.current_screen.index == 0:
-                    groups = groups[:4]
-                else:
-                    groups = groups[4:]
+            partition.update(len(qtile.screens))
+            names = partition.groups_on(qtile.current_screen.index)
+            groups = [qtile.groups_map[name] for name in names]
             return qtile.current_screen.start_group_slide(
                 groups=groups, scale=1.6, inertia_threshold=15,
             )
@@ -343,69 +341,122 @@ border_focus = [colours[5], "323974"]
 border_normal = "001122"
 
 
+def _invalidates_geometry(method):
+    """Wrap a Columns method so that it drops MyColumns' cached geometry."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._geometry = None
+        return result
+
+    return wrapper
+
+
 class MyColumns(layout.Columns):
     """
     I only override this method so I can make 'foot' have wide margins at each side if
     it's the only window open.
+
+    The geometry of every client is calculated in a single pass and cached until the
+    columns change or the screen area is different, so that a full layout pass doesn't
+    rescan the columns once per client.
     """
 
-    def configure(self, client, screen_rect):
+    def __init__(self, **config):
+        layout.Columns.__init__(self, **config)
+        self._geometry = None
+        self._geometry_rect = None
+
+    def clone(self, group):
+        c = layout.Columns.clone(self, group)
+        c._geometry = None
+        return c
+
+    add_client = _invalidates_geometry(layout.Columns.add_client)
+    remove = _invalidates_geometry(layout.Columns.remove)
+    toggle_split = _invalidates_geometry(layout.Columns.toggle_split)
+    shuffle_left = _invalidates_geometry(layout.Columns.shuffle_left)
+    shuffle_right = _invalidates_geometry(layout.Columns.shuffle_right)
+    shuffle_up = _invalidates_geometry(layout.Columns.shuffle_up)
+    shuffle_down = _invalidates_geometry(layout.Columns.shuffle_down)
+    grow_left = _invalidates_geometry(layout.Columns.grow_left)
+    grow_right = _invalidates_geometry(layout.Columns.grow_right)
+    grow_up = _invalidates_geometry(layout.Columns.grow_up)
+    grow_down = _invalidates_geometry(layout.Columns.grow_down)
+    normalize = _invalidates_geometry(layout.Columns.normalize)
+    reset = _invalidates_geometry(layout.Columns.reset)
+    swap_column_left = _invalidates_geometry(layout.Columns.swap_column_left)
+    swap_column_right = _invalidates_geometry(layout.Columns.swap_column_right)
+
+    def _update_geometry(self, screen_rect):
+        geometry = {}
+        ncols = len(self.columns)
         pos = 0
         for col in self.columns:
-            if client in col:
-                break
+            border = self.border_width
+            single = ncols == 1 and (len(col) == 1 or not col.split)
+            if single and not self.border_on_single:
+                border = 0
+            width = int(0.5 + col.width * screen_rect.width * 0.01 / ncols)
+            x = screen_rect.x + int(0.5 + pos * screen_rect.width * 0.01 / ncols)
             pos += col.width
-        else:
+
+            row = 0
+            for client in col:
+                margin_size = self.margin
+                if single and "foot" in (client.get_wm_class() or []):
+                    margin_size = [0, 200, 0, 200]
+                if col.split:
+                    height = int(
+                        0.5 + col.heights[client] * screen_rect.height * 0.01 / len(col)
+                    )
+                    y = screen_rect.y + int(
+                        0.5 + row * screen_rect.height * 0.01 / len(col)
+                    )
+                    row += col.heights[client]
+                else:
+                    height = screen_rect.height
+                    y = screen_rect.y
+                geometry[client] = (
+                    col,
+                    x,
+                    y,
+                    width - 2 * border,
+                    height - 2 * border,
+                    border,
+                    margin_size,
+                )
+
+        self._geometry = geometry
+        self._geometry_rect = (
+            screen_rect.x,
+            screen_rect.y,
+            screen_rect.width,
+            screen_rect.height,
+        )
+
+    def configure(self, client, screen_rect):
+        rect = (screen_rect.x, screen_rect.y, screen_rect.width, screen_rect.height)
+        if self._geometry is None or self._geometry_rect != rect:
+            self._update_geometry(screen_rect)
+
+        try:
+            col, x, y, width, height, border, margin_size = self._geometry[client]
+        except KeyError:
+            client.hide()
+            return
+
+        if not col.split and client != col.cw:
             client.hide()
             return
+
         if client.has_focus:
             color = self.border_focus if col.split else self.border_focus_stack
         else:
             color = self.border_normal if col.split else self.border_normal_stack
-        border = self.border_width
-        margin_size = self.margin
-        if len(self.columns) == 1 and (len(col) == 1 or not col.split):
-            if not self.border_on_single:
-                border = 0
-            if "foot" in (client.get_wm_class() or []):
-                margin_size = [0, 200, 0, 200]
-        width = int(0.5 + col.width * screen_rect.width * 0.01 / len(self.columns))
-        x = screen_rect.x + int(
-            0.5 + pos * screen_rect.width * 0.01 / len(self.columns)
-        )
-        if col.split:
-            pos = 0
-            for c in col:
-                if client == c:
-                    break
-                pos += col.heights[c]
-            height = int(
-                0.5 + col.heights[client] * screen_rect.height * 0.01 / len(col)
-            )
-            y = screen_rect.y + int(0.5 + pos * screen_rect.height * 0.01 / len(col))
-            client.place(
-                x,
-                y,
-                width - 2 * border,
-                height - 2 * border,
-                border,
-                color,
-                margin=margin_size,
-            )
-            client.unhide()
-        elif client == col.cw:
-            client.place(
-                x,
-                screen_rect.y,
-                width - 2 * border,
-                screen_rect.height - 2 * border,
-                border,
-                color,
-                margin=margin_size,
-            )
-            client.unhide()
-        else:
-            client.hide()
+        client.place(x, y, width, height, border, color, margin=margin_size)
+        client.unhide()
 
 
 # Weird custom behaviour here but isn't that what qtile is for?
@@ -429,55 +480,12 @@ layouts = [
     layout.Columns(**col_opts),
 ]
 
-floating_layout = layout.Floating(
+floating_layout = Floating(
     border_width=3,
     border_focus=border_focus,
     border_normal="00000000",
     fullscreen_border_width=0,
-    float_rules=[
-        Match(func=base.Window.has_fixed_size),
-        Match(func=base.Window.has_fixed_ratio),
-        Match(func=lambda c: bool(c.is_transient_for())),
-        Match(role="gimp-file-export"),
-        Match(title="Bluetooth Devices"),
-        Match(title="File Operation Progress", wm_class=re.compile("[Tt]hunar")),
-        Match(title="Firefox — Sharing Indicator"),
-        Match(title="KDE Connect Daemon"),
-        Match(title="Open File"),
-        Match(title="Unlock Database - KeePassXC"),
-        Match(title="KeePassXC -  Access Request"),
-        Match(title=re.compile("Presenting: .*"), wm_class="libreoffice-impress"),
-        Match(wm_class="Arandr"),
-        Match(wm_class="Dragon"),
-        Match(wm_class="Dragon-drag-and-drop"),
-        Match(wm_class="Pinentry-gtk-2"),
-        Match(wm_class="Xephyr"),
-        Match(wm_class="confirm"),
-        Match(wm_class="dialog"),
-        Match(wm_class="download"),
-        Match(wm_class="eog"),
-        Match(wm_class="error"),
-        Match(wm_class="file_progress"),
-        Match(wm_class="imv"),
-        Match(wm_class="io.github.celluloid_player.Celluloid"),
-        Match(wm_class="lxappearance"),
-        Match(wm_class="matplotlib"),
-        #Match(wm_class="mpv"),
-        Match(wm_class="nm-connection-editor"),
-        Match(wm_class="notification"),
-        Match(wm_class="org.gnome.clocks"),
-        Match(wm_class="org.kde.ark"),
-        Match(wm_class="pavucontrol"),
-        Match(wm_class="qt5ct"),
-        Match(wm_class="ssh-askpass"),
-        Match(wm_class="thunar"),
-        Match(wm_class="toolbar"),
-        Match(wm_class="tridactyl"),
-        Match(wm_class="wdisplays"),
-        Match(wm_class="wlroots"),
-        Match(wm_class="zoom"),
-        Match(wm_type="dialog"),
-    ],
+    float_rules=float_rules,
 )
 
 
@@ -514,7 +522,15 @@ groupbox_config = {
 #    scroll=True,
 # )
 
-mpd2 = widget.Mpris2(
+
+class MyMpris2(RenderOnce, StripScroll, widget.Mpris2):
+    """
+    Mpris2 widget that is only rendered once for both bars, and which scrolls by moving
+    over a pre-rendered strip of its text. It stops scrolling while paused.
+    """
+
+
+mpd2 = MyMpris2(
     name="mpris",
     width=1000,
     objname=None,
@@ -523,9 +539,31 @@ mpd2 = widget.Mpris2(
 )
 
 
-class MyVolume(widget.Volume):
+class MyVolume(RenderOnce, widget.Volume):
+    """
+    Volume widget that shows an icon. The mixer is controlled in-process through
+    libasound, and the icon is updated when the mixer reports a change rather than by
+    polling. If libasound can't be used then amixer is used instead.
+    """
+
+    def __init__(self, **config):
+        widget.Volume.__init__(self, **config)
+        self._mixer = None
+        self._mixer_fds = []
+        self._volume_changes = Coalescer(self._change_volume)
+
     def _configure(self, qtile, bar):
         widget.Volume._configure(self, qtile, bar)
+        if self._mixer is None:
+            try:
+                self._mixer = alsa.Mixer(self.cardid, self.channel)
+            except alsa.AlsaError:
+                logger.exception("Could not open ALSA mixer, falling back to amixer")
+            else:
+                loop = asyncio.get_running_loop()
+                self._mixer_fds = self._mixer.poll_fds()
+                for fd in self._mixer_fds:
+                    loop.add_reader(fd, self._mixer_changed)
         self.volume = self.get_volume()
         if self.volume <= 0:
             self.text = ""
@@ -536,6 +574,38 @@ class MyVolume(widget.Volume):
         else:
             self.text = ""
 
+    def timer_setup(self):
+        # Mixer events replace polling when the mixer is available
+        if self._mixer is None:
+            widget.Volume.timer_setup(self)
+
+    def finalize(self):
+        self._volume_changes.cancel()
+        if self._mixer is not None:
+            loop = asyncio.get_running_loop()
+            for fd in self._mixer_fds:
+                loop.remove_reader(fd)
+            self._mixer.close()
+            self._mixer = None
+        widget.Volume.finalize(self)
+
+    def get_volume(self):
+        if self._mixer is None:
+            return widget.Volume.get_volume(self)
+        if self._mixer.muted:
+            return -1
+        return self._mixer.get_volume()
+
+    def _mixer_changed(self):
+        self._mixer.handle_events()
+        self._refresh()
+
+    def _refresh(self):
+        volume = self.get_volume()
+        if volume != self.volume:
+            self.volume = volume
+            self._update_drawer()
+
     def _update_drawer(self):
         if self.volume <= 0:
             self.text = ""
@@ -547,26 +617,35 @@ class MyVolume(widget.Volume):
             self.text = ""
         self.draw()
 
+    def _change_volume(self, delta):
+        if self._mixer is None:
+            change = f"{abs(delta)}%{'+' if delta > 0 else '-'}"
+            subprocess.run(["amixer", "-c", "PCH", "set", "PCM", change], capture_output=True)
+        else:
+            self._mixer.change_volume(delta)
+        self._refresh()
+
     def increase_vol(self):
-        subprocess.run("amixer -c PCH set PCM 3%+".split(), capture_output=True)
-        self.volume = self.get_volume()
+        self._volume_changes.add(3)
 
     def decrease_vol(self):
-        subprocess.run("amixer -c PCH set PCM 3%-".split(), capture_output=True)
-        self.volume = self.get_volume()
+        self._volume_changes.add(-3)
 
     def mute(self):
-        subprocess.run("amixer -c PCH set PCM toggle".split(), capture_output=True)
-        self.volume = self.get_volume()
+        if self._mixer is None:
+            subprocess.run("amixer -c PCH set PCM toggle".split(), capture_output=True)
+        else:
+            self._mixer.toggle_mute()
+        self._refresh()
 
 
-bklight = widget.Backlight(
-    backlight_name=os.listdir("/sys/class/backlight")[-1],
+bklight = LazyWidget(
+    "brightness.MyBacklight",
+    name="backlight",
     step=1,
     update_interval=None,
     format="",
     fontsize=icon_font_size,
-    change_command=None,
 )
 
 volume = MyVolume(
@@ -579,59 +658,12 @@ volume = MyVolume(
 )
 
 if IS_WAYLAND:
-    systray = widget_extras.StatusNotifier(padding=20)
+    systray = LazyWidget("qtile_extras.widget.StatusNotifier", padding=20)
 else:
     systray = widget.Systray(padding=20, icon_size=24)
 
-
-class MyBattery(Battery):
-    """
-    This is basically the Battery widget except it uses some icons, and if you click it
-    it will show the percentage numerically for 1 second.
-    """
-
-    def build_string(self, status):
-        if self.layout is not None:
-            self.layout.colour = self.foreground
-            if (
-                status.state == BatteryState.DISCHARGING
-                and status.percent < self.low_percentage
-            ):
-                self.background = self.low_background
-            else:
-                self.background = self.normal_background
-        if status.state == BatteryState.DISCHARGING:
-            if status.percent > 0.75:
-                char = ""
-            elif status.percent > 0.45:
-                char = ""
-            elif status.percent > 0.25:
-                char = ""
-            else:
-                char = ""
-        elif status.percent >= 1 or status.state == BatteryState.FULL:
-            char = ""
-        elif status.state == BatteryState.EMPTY or (
-            status.state == BatteryState.UNKNOWN and status.percent == 0
-        ):
-            char = ""
-        else:
-            char = ""
-        return self.format.format(char=char, percent=status.percent)
-
-    def restore(self):
-        self.format = "{char}"
-        self.font = "Font Awesome 5 Free"
-        self.timer_setup()
-
-    def button_press(self, x, y, button):
-        self.format = "{percent:2.0%}"
-        self.font = "TamzenForPowerline Bold"
-        self.timer_setup()
-        self.timeout_add(1, self.restore)
-
-
-battery = MyBattery(
+battery = LazyWidget(
+    "battery.MyBattery",
     format="{char}",
     low_background=colours[1],
     show_short_text=False,
@@ -640,18 +672,43 @@ battery = MyBattery(
     fontsize=icon_font_size + 10,
 )
 
-date = widget.Clock(
+
+class MyClock(RenderOnce, widget.Clock):
+    """
+    Clock that is updated by the shared ticker exactly on the minute or day boundaries
+    (depending on its format) and is only redrawn when its text actually changes.
+    """
+
+    def timer_setup(self):
+        self._unit = ticker.unit_for_format(self.format)
+        if self._unit is None:
+            widget.Clock.timer_setup(self)
+            return
+        self._ticker = ticker.ticker
+        self._ticker.subscribe(self._unit, self._tick)
+        self._tick()
+
+    def finalize(self):
+        if getattr(self, "_unit", None) is not None:
+            self._ticker.unsubscribe(self._unit, self._tick)
+        widget.Clock.finalize(self)
+
+    def _tick(self):
+        text = self.poll()
+        if text != self.text:
+            self.update(text)
+
+
+date = MyClock(
     format="%e/%m/%g",
     fontsize=16,
     font="TamzenForPowerline Bold",
-    update_interval=60,
     name="date",
 )
 
-time = widget.Clock(
+time = MyClock(
     fontsize=20,
     font="TamzenForPowerline Medium",
-    update_interval=60,
     name="time",
 )
 
@@ -661,24 +718,28 @@ groupboxes = [
 ]
 
 
-@hook.subscribe.startup
-def _():
-    # Set up initial GroupBox visible groups
-    if len(qtile.screens) > 1:
-        groupboxes[0].visible_groups = ["1", "2", "3", "4"]
-    else:
-        groupboxes[0].visible_groups = None
+def _set_visible_groups(count):
+    # Each screen's GroupBox shows the groups belonging to that screen
+    partition.update(count)
+    for index, groupbox in enumerate(groupboxes):
+        if count > 1:
+            groupbox.visible_groups = partition.groups_on(index)
+        else:
+            groupbox.visible_groups = None
+
+
+@hooks.subscribe.startup
+def _start_visible_groups():
+    _set_visible_groups(len(qtile.screens))
 
 
-@hook.subscribe.screens_reconfigured
-def _():
+@hooks.subscribe.screens_reconfigured
+def _reconfigure_visible_groups():
     # Reconfigure GroupBox visible groups
-    if len(qtile.screens) > 1:
-        groupboxes[0].visible_groups = ["1", "2", "3", "4"]
-    else:
-        groupboxes[0].visible_groups = None
-    if hasattr(groupboxes[0], "bar"):
-        groupboxes[0].bar.draw()
+    _set_visible_groups(len(qtile.screens))
+    for groupbox in groupboxes:
+        if hasattr(groupbox, "bar"):
+            groupbox.bar.draw()
 
 
 #bar_border_width = [0, 3, 0, 3]
@@ -686,7 +747,7 @@ def _():
 
 screens = [
     Screen(
-        top=bar.Bar(
+        top=DamageBar(
             [
                 groupboxes[0],
                 widget.Spacer(name="s1"),
@@ -709,7 +770,7 @@ screens = [
         #wallpaper_mode="fill",
     ),
     Screen(
-        top=bar.Bar(
+        top=DamageBar(
             [
                 groupboxes[1],
                 widget.Spacer(name="s3"),
@@ -732,13 +793,59 @@ screens = [
     ),
 ]
 
+# The startup hook doesn't fire when the config is reloaded, and qtile.screens has been
+# cleared by then, so count the screens defined above that Qtile will give an output
+_outputs = {(info.x, info.y) for info in qtile.core.get_screen_info()}
+_set_visible_groups(min(len(screens), len(_outputs)))
+
+
+# Static windows keyed by window ID, so that focus changes don't need to scan every
+# window in windows_map
+static_windows: dict[int, base.Static] = {
+    wid: window
+    for wid, window in qtile.windows_map.items()
+    if isinstance(window, base.Static)
+}
+
+
+def _overlaps(a, b) -> bool:
+    """Whether two windows' areas, including borders, intersect."""
+    a_bw = getattr(a, "borderwidth", 0)
+    b_bw = getattr(b, "borderwidth", 0)
+    return (
+        a.x < b.x + b.width + 2 * b_bw
+        and b.x < a.x + a.width + 2 * a_bw
+        and a.y < b.y + b.height + 2 * b_bw
+        and b.y < a.y + a.height + 2 * a_bw
+    )
+
+
+@hooks.subscribe.client_new
+def _track_new_static(window):
+    if isinstance(window, base.Static):
+        static_windows[window.wid] = window
 
-@hook.subscribe.client_focus
-def _(_):
-    # Keep Static windows on top
-    for window in qtile.windows_map.values():
-        if isinstance(window, base.Static):
-            window.bring_to_front()
+
+@hooks.subscribe.client_managed
+def _track_managed_static(window):
+    # window.static() fires client_managed with the new Static window
+    if isinstance(window, base.Static):
+        static_windows[window.wid] = window
+        window.bring_to_front()
+
+
+@hooks.subscribe.client_killed
+def _forget_static(window):
+    static_windows.pop(window.wid, None)
+
+
+@hooks.subscribe.client_focus
+def _raise_static(window):
+    # Keep Static windows on top. Only those that the focussed window could cover need
+    # restacking; the rest are still on top already.
+    for static in static_windows.values():
+        if static is not window and _overlaps(window, static):
+            static.bring_to_front()
 
 
 reconfigure_screens = True
@@ -748,5 +855,8 @@ cursor_warp = False
 auto_fullscreen = True
 focus_on_window_activation = "focus"
 
-keys = [Key(mods, key, cmd, desc=desc) for mods, key, cmd, desc in my_keys]
-groups.append(scratchpad)
+keys = keymap.build(my_keys)
+# The groups module isn't reloaded if it hasn't changed, so don't modify its list
+groups = [*groups, scratchpad]
+
+reloader.record_loaded(reloader.CONFIG_DIR)
@@ -0,0 +1,111 @@
+"""
+Damage-tracked bars
+===================
+
+A bar redraw normally redraws every widget in the bar. ``DamageBar`` remembers where
+each widget was last drawn and skips those that haven't moved or changed size and whose
+content is known to be up to date, which is the case for:
+
+ - widgets (and their mirrors) using ``mirror.RenderOnce`` that report ``is_clean()``
+ - spacers, which only ever fill their space with the background
+
+Everything is redrawn when the bar is (re)configured or its window is exposed.
+
+The bar's ``info`` command includes counters of how many widgets have been redrawn and
+the area covered, so the effect can be checked with e.g.
+``qtile cmd-obj -o bar top -f info``.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from libqtile import bar, widget
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from libqtile.widget.base import _Widget
+
+
+class DamageBar(bar.Bar):
+    def __init__(self, widgets, size, **config):
+        bar.Bar.__init__(self, widgets, size, **config)
+        self._full_redraw = True
+        self._drawn: dict[_Widget, tuple[int, int, int]] = {}
+        self._drawn_end: int | None = None
+        self.full_redraws = 0
+        self.partial_redraws = 0
+        self.widget_redraws = 0
+        self.redraw_area = 0
+
+    def _configure(self, qtile, screen, reconfigure=False):
+        bar.Bar._configure(self, qtile, screen, reconfigure=reconfigure)
+        self._full_redraw = True
+        if self.window:
+            self.window.process_window_expose = self.redraw_all
+
+    def redraw_all(self) -> None:
+        """Redraw every widget, e.g. after the window contents were lost."""
+        self._full_redraw = True
+        self.draw()
+
+    def _geometry(self, w: _Widget) -> tuple[int, int, int]:
+        return (w.offsetx, w.offsety, w.length)
+
+    def _is_clean(self, w: _Widget) -> bool:
+        if self._drawn.get(w) != self._geometry(w):
+            return False
+        if isinstance(w, widget.Spacer):
+            return True
+        is_clean = getattr(w, "is_clean", None)
+        return is_clean is not None and is_clean()
+
+    def _count(self, w: _Widget) -> None:
+        self.widget_redraws += 1
+        self.redraw_area += max(w.length, 0) * self.size
+        self._drawn[w] = self._geometry(w)
+
+    def _widgets_end(self) -> int:
+        last = self.widgets[-1]
+        if self.horizontal:
+            return last.offsetx + last.length
+        return last.offsety + last.length
+
+    def _actual_draw(self) -> None:
+        if self._full_redraw:
+            self._full_redraw = False
+            self.full_redraws += 1
+            bar.Bar._actual_draw(self)
+            self._drawn.clear()
+            for w in self.widgets:
+                self._count(w)
+            self._drawn_end = self._widgets_end()
+            return
+
+        self._draw_queued = False
+        self.partial_redraws += 1
+        self._resize(self._length, self.widgets)
+        for w in self.widgets:
+            if not self._is_clean(w):
+                w.draw()
+                self._count(w)
+
+        # If the widgets' end moved, the free space at the end needs filling again
+        if self._widgets_end() != self._drawn_end:
+            self._full_redraw = True
+            self._actual_draw()
+
+    def finalize(self) -> None:
+        self._drawn.clear()
+        bar.Bar.finalize(self)
+
+    def info(self) -> dict[str, Any]:
+        info = bar.Bar.info(self)
+        info["damage"] = dict(
+            full_redraws=self.full_redraws,
+            partial_redraws=self.partial_redraws,
+            widget_redraws=self.widget_redraws,
+            redraw_area=self.redraw_area,
+        )
+        return info
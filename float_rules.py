@@ -0,0 +1,254 @@
+"""
+Float rules
+===========
+
+The rules deciding which new windows float. Rather than comparing each new window
+against every ``Match`` in turn, the rules are compiled when the config is loaded:
+
+ - single-property rules with plain strings become set lookups
+ - single-property rules with regexes are joined into one regex per property
+ - the remaining rules on title/class/role/type are compared afterwards
+ - ``func``, ``net_wm_pid`` and ``wid`` rules go last as they need the window itself
+
+Decisions for the first three tiers only depend on a window's class, title, role and
+type, so they are memoized on that tuple.
+
+Running this file directly replays a JSON list of captured window properties, each
+``[wm_class, title, role, wm_type]``, through both the compiled rules and the plain
+``Match.compare`` loop, and prints the time each takes:
+
+    python float_rules.py tests/windows.json
+
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import TYPE_CHECKING
+
+from libqtile import layout
+from libqtile.backend import base
+from libqtile.config import Match
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+# The properties that can be read without the window itself
+PROPERTIES = ("wm_class", "title", "role", "wm_type")
+
+float_rules: list[Match] = [
+    Match(func=base.Window.has_fixed_size),
+    Match(func=base.Window.has_fixed_ratio),
+    Match(func=lambda c: bool(c.is_transient_for())),
+    Match(role="gimp-file-export"),
+    Match(title="Bluetooth Devices"),
+    Match(title="File Operation Progress", wm_class=re.compile("[Tt]hunar")),
+    Match(title="Firefox — Sharing Indicator"),
+    Match(title="KDE Connect Daemon"),
+    Match(title="Open File"),
+    Match(title="Unlock Database - KeePassXC"),
+    Match(title="KeePassXC -  Access Request"),
+    Match(title=re.compile("Presenting: .*"), wm_class="libreoffice-impress"),
+    Match(wm_class="Arandr"),
+    Match(wm_class="Dragon"),
+    Match(wm_class="Dragon-drag-and-drop"),
+    Match(wm_class="Pinentry-gtk-2"),
+    Match(wm_class="Xephyr"),
+    Match(wm_class="confirm"),
+    Match(wm_class="dialog"),
+    Match(wm_class="download"),
+    Match(wm_class="eog"),
+    Match(wm_class="error"),
+    Match(wm_class="file_progress"),
+    Match(wm_class="imv"),
+    Match(wm_class="io.github.celluloid_player.Celluloid"),
+    Match(wm_class="lxappearance"),
+    Match(wm_class="matplotlib"),
+    #Match(wm_class="mpv"),
+    Match(wm_class="nm-connection-editor"),
+    Match(wm_class="notification"),
+    Match(wm_class="org.gnome.clocks"),
+    Match(wm_class="org.kde.ark"),
+    Match(wm_class="pavucontrol"),
+    Match(wm_class="qt5ct"),
+    Match(wm_class="ssh-askpass"),
+    Match(wm_class="thunar"),
+    Match(wm_class="toolbar"),
+    Match(wm_class="tridactyl"),
+    Match(wm_class="wdisplays"),
+    Match(wm_class="wlroots"),
+    Match(wm_class="zoom"),
+    Match(wm_type="dialog"),
+]
+
+
+class _Properties:
+    """
+    Stands in for a window when comparing rules that only need its properties, and
+    when replaying captured properties.
+    """
+
+    def __init__(self, wm_class, title, role, wm_type):
+        self.wm_class = wm_class
+        self.name = title
+        self.role = role
+        self.wm_type = wm_type
+
+    def get_wm_class(self):
+        return self.wm_class
+
+    def get_wm_role(self):
+        return self.role
+
+    def get_wm_type(self):
+        return self.wm_type
+
+    def has_fixed_size(self):
+        return False
+
+    def has_fixed_ratio(self):
+        return False
+
+    def is_transient_for(self):
+        return None
+
+
+def _get_properties(win) -> tuple:
+    wm_class = win.get_wm_class()
+    return (
+        tuple(wm_class) if wm_class else None,
+        win.name,
+        win.get_wm_role(),
+        win.get_wm_type(),
+    )
+
+
+class CompiledFloatRules:
+    """A list of ``Match`` objects compiled into lookup tables and combined regexes."""
+
+    def __init__(self, rules: list[Match]):
+        exact: dict[str, set[str]] = {p: set() for p in PROPERTIES}
+        patterns: dict[str, list[str]] = {p: [] for p in PROPERTIES}
+        self.generic: list[Match] = []
+        self.expensive: list[Match] = []
+
+        for rule in rules:
+            items = list(rule._rules.items())
+            if any(name in ("func", "net_wm_pid", "wid") for name, _ in items):
+                self.expensive.append(rule)
+                continue
+
+            if len(items) == 1 and items[0][0] in PROPERTIES:
+                name, value = items[0]
+                if isinstance(value, str):
+                    exact[name].add(value)
+                    continue
+                if isinstance(value, re.Pattern) and _can_combine(value):
+                    patterns[name].append(value.pattern)
+                    continue
+
+            self.generic.append(rule)
+
+        self.exact = {name: frozenset(values) for name, values in exact.items()}
+        self.regex = {
+            name: re.compile("|".join(f"(?:{p})" for p in values))
+            for name, values in patterns.items()
+            if values
+        }
+        self._decide = functools.lru_cache(maxsize=512)(self._decide_properties)
+
+    def _decide_properties(self, wm_class, title, role, wm_type) -> bool:
+        values: dict[str, Any] = dict(title=title, role=role, wm_type=wm_type)
+
+        if wm_class:
+            exact = self.exact["wm_class"]
+            if any(v in exact for v in wm_class):
+                return True
+        for name, value in values.items():
+            if value is not None and value in self.exact[name]:
+                return True
+
+        if wm_class and "wm_class" in self.regex:
+            regex = self.regex["wm_class"]
+            if any(regex.match(v) for v in wm_class):
+                return True
+        for name, value in values.items():
+            if value is not None and name in self.regex and self.regex[name].match(value):
+                return True
+
+        if self.generic:
+            props = _Properties(list(wm_class) if wm_class else None, title, role, wm_type)
+            return any(rule.compare(props) for rule in self.generic)
+
+        return False
+
+    def compare(self, win) -> bool:
+        """Whether any of the rules match this window."""
+        if self._decide(*_get_properties(win)):
+            return True
+        return any(rule.compare(win) for rule in self.expensive)
+
+
+def _can_combine(pattern: re.Pattern) -> bool:
+    # Patterns with their own flags or named groups can't be safely joined together
+    return not pattern.groupindex and pattern.flags == re.compile("").flags
+
+
+# The last rules to be compiled. These are reused when the config is reloaded without
+# this module having changed.
+_compiled: tuple[list[Match], CompiledFloatRules] | None = None
+
+
+def compile_rules(rules: list[Match]) -> CompiledFloatRules:
+    global _compiled
+    if _compiled is None or _compiled[0] is not rules:
+        _compiled = (rules, CompiledFloatRules(rules))
+    return _compiled[1]
+
+
+class Floating(layout.Floating):
+    """Floating layout that checks new windows against compiled float rules."""
+
+    def __init__(self, float_rules=None, **config):
+        layout.Floating.__init__(self, float_rules=float_rules, **config)
+        self.compiled_rules = compile_rules(self.float_rules)
+
+    def match(self, win):
+        return self.compiled_rules.compare(win)
+
+
+def benchmark(rules: list[Match], windows: list[list], repeat: int = 100) -> tuple:
+    """
+    Replay captured window properties through the linear ``Match.compare`` loop and
+    through the compiled rules. Returns the time taken by each, in seconds.
+    """
+    from timeit import timeit
+
+    clients = [_Properties(*props) for props in windows]
+    compiled = CompiledFloatRules(rules)
+
+    for client in clients:
+        assert compiled.compare(client) == any(r.compare(client) for r in rules), (
+            f"Compiled rules disagree for {_get_properties(client)}"
+        )
+
+    linear = timeit(
+        lambda: [any(r.compare(c) for r in rules) for c in clients], number=repeat
+    )
+    fast = timeit(lambda: [compiled.compare(c) for c in clients], number=repeat)
+    return linear, fast
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    with open(sys.argv[1]) as f:
+        windows = json.load(f)
+
+    linear, fast = benchmark(float_rules, windows)
+    print(f"{len(windows)} windows, {len(float_rules)} rules")
+    print(f"Match.compare loop: {linear * 1000:.2f} ms")
+    print(f"Compiled rules:     {fast * 1000:.2f} ms ({linear / fast:.1f}x)")
@@ -3,7 +3,8 @@ Groups
 ======
 
  - 8 groups
- - 4 bound to each screen when using two monitors
+ - split between the screens when using more than one monitor, e.g. 4 bound to each
+   screen when using two
 
 """
 
@@ -12,12 +13,15 @@ from __future__ import annotations
 import os
 from typing import TYPE_CHECKING
 
-from libqtile import hook, qtile
+from libqtile import qtile
 from libqtile.config import Group, Match
 from libqtile.lazy import lazy
 
+import hooks
+from partition import Partition
+
 if TYPE_CHECKING:
-    from typing import Any, Callable
+    from typing import Any
 
     from libqtile.core.manager import Qtile
 
@@ -41,26 +45,30 @@ groups: list[Group] = [
 ]
 
 
+# How the groups are split between the screens
+partition = Partition([g.name for g in groups])
+
+
 def _go_to_group(qtile: Qtile, name: str) -> None:
     """
     This creates lazy functions that jump to a given group. When there is more than one
-    screen, the first 4 and second 4 groups are kept on the first and second screen.
-    E.g. going to the fifth group when the first group (and first screen) is focussed
-    will also change the screen to the second screen.
+    screen, each screen keeps its own run of groups (see ``partition``). E.g. going to
+    the fifth group when the first group (and first screen) is focussed will also change
+    the screen to the second screen.
     """
+    partition.update(len(qtile.screens))
     if len(qtile.screens) == 1:
         qtile.groups_map[name].toscreen(toggle=True)
         return
 
-    old = qtile.current_screen.group.name
-    if name in "1234":
-        qtile.focus_screen(0)
-        if old in "1234" or qtile.current_screen.group.name != name:
-            qtile.groups_map[name].toscreen(toggle=True)
-    else:
-        qtile.focus_screen(1)
-        if old in "qwer" or qtile.current_screen.group.name != name:
-            qtile.groups_map[name].toscreen(toggle=True)
+    screen = partition.screen_of(name)
+    if screen is None:
+        # It isn't one of the partitioned groups, so it is shown on the current screen
+        screen = qtile.current_screen.index
+    old = partition.screen_of(qtile.current_screen.group.name)
+    qtile.focus_screen(screen)
+    if old == screen or qtile.current_screen.group.name != name:
+        qtile.groups_map[name].toscreen(toggle=True)
 
 
 for i in groups:
@@ -87,18 +95,10 @@ def _scroll_screen(qtile: Qtile, direction: int) -> None:
     Scroll to the next/prev group of the subset allocated to a specific screen. This
     will rotate between e.g. 1->2->3->4->1 when the first screen is focussed.
     """
-    if len(qtile.screens) == 1:
-        current = qtile.groups.index(qtile.current_group)
-        destination = (current + direction) % 8
-        qtile.groups[destination].toscreen()
-        return
-
-    current = qtile.groups.index(qtile.current_group)
-    if current < 4:
-        destination = (current + direction) % 4
-    else:
-        destination = ((current - 4 + direction) % 4) + 4
-    qtile.groups[destination].toscreen()
+    partition.update(len(qtile.screens))
+    destination = partition.step(qtile.current_group.name, direction)
+    if destination is not None:
+        qtile.groups_map[destination].toscreen()
 
 
 keys_group.extend(
@@ -109,20 +109,23 @@ keys_group.extend(
 )
 
 
-@hook.subscribe.startup
-def _():
+@hooks.subscribe.startup
+def _set_initial_groups():
     # Set initial groups
+    partition.update(len(qtile.screens))
     if len(qtile.screens) > 1:
-        qtile.groups_map["1"].toscreen(0, toggle=False)
-        qtile.groups_map["q"].toscreen(1, toggle=False)
+        for screen in range(len(qtile.screens)):
+            if names := partition.groups_on(screen):
+                qtile.groups_map[names[0]].toscreen(screen, toggle=False)
         qtile.focus_screen(1)
 
 
-@hook.subscribe.screens_reconfigured
-def _():
+@hooks.subscribe.screens_reconfigured
+def _set_screen_groups():
     # Set groups to screens
+    partition.update(len(qtile.screens))
     if len(qtile.screens) > 1:
-        if qtile.screens[0].group.name not in "1234":
-            qtile.groups_map["1"].toscreen(0, toggle=False)
-        if qtile.screens[1].group.name in "1234":
-            qtile.groups_map["q"].toscreen(1, toggle=False)
+        for screen in range(len(qtile.screens)):
+            names = partition.groups_on(screen)
+            if names and qtile.screens[screen].group.name not in names:
+                qtile.groups_map[names[0]].toscreen(screen, toggle=False)
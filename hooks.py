@@ -0,0 +1,122 @@
+"""
+Hook registry
+=============
+
+``libqtile.hook.subscribe`` only ignores a function that is already subscribed, so when
+a config module is executed again its hook functions, being new objects, are subscribed
+alongside the old ones. Config modules subscribe through this module instead:
+
+    import hooks
+
+    @hooks.subscribe.client_new
+    def float_small_windows(window):
+        ...
+
+Subscriptions are registered against the function's module. Before a config module is
+executed again, ``forget`` unsubscribes and drops everything it registered, so hook
+functions that have been renamed or removed since don't stay subscribed.
+
+Qtile clears all subscriptions when the config is reloaded, so ``resubscribe`` subscribes
+the registered functions again, for the modules that aren't executed again.
+
+The ``hook_subscriptions`` command lists the active subscriptions for each hook:
+
+    qtile cmd-obj -o cmd -f hook_subscriptions
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from libqtile import hook, qtile
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable, Iterator
+
+
+# Module -> (hook name, function) for each function it subscribed
+_registry: dict[str, list[tuple[str, Callable]]] = {}
+
+
+def _subscriptions() -> Iterator[tuple[str, Callable]]:
+    """(hook name, function) pairs for Qtile's current hook subscriptions."""
+    # Newer versions of Qtile keep a dict of subscriptions per registry
+    subscriptions = hook.subscriptions.get("qtile", hook.subscriptions)
+    for event, funcs in list(subscriptions.items()):
+        if isinstance(funcs, list):
+            for func in funcs:
+                yield event, func
+
+
+def _module(func: Callable) -> str:
+    return getattr(func, "__module__", None) or ""
+
+
+def _name(func: Callable) -> str:
+    module = _module(func)
+    name = getattr(func, "__qualname__", None) or repr(func)
+    return f"{module}.{name}" if module else name
+
+
+class _Subscribe:
+    def __getattr__(self, event: str) -> Callable[[Callable], Callable]:
+        if event.startswith("_"):
+            raise AttributeError(event)
+        # Fail now for hooks that don't exist, rather than when subscribing
+        getattr(hook.subscribe, event)
+
+        def subscribe(func: Callable) -> Callable:
+            _registry.setdefault(_module(func), []).append((event, func))
+            getattr(hook.subscribe, event)(func)
+            return func
+
+        return subscribe
+
+
+subscribe = _Subscribe()
+
+
+def forget(module: str) -> None:
+    """Unsubscribe and drop the functions a module subscribed, before it is executed again."""
+    current = set(_subscriptions())
+    for event, func in _registry.pop(module, []):
+        if (event, func) in current:
+            getattr(hook.unsubscribe, event)(func)
+
+
+def resubscribe(executing: Iterable[str] = ()) -> None:
+    """
+    Subscribe any registered functions that aren't currently subscribed, except those of
+    the modules that are about to be executed again.
+    """
+    current = set(_subscriptions())
+    for module, subscribed in list(_registry.items()):
+        if module in executing:
+            continue
+        for event, func in subscribed:
+            if (event, func) not in current:
+                getattr(hook.subscribe, event)(func)
+
+
+def subscriptions(_qtile: Any = None) -> dict[str, list[str]]:
+    """The names of the functions subscribed to each hook, in the order they are run."""
+    # Qtile calls the commands in its _commands with itself as the first argument
+    active: dict[str, list[str]] = {}
+    for event, func in _subscriptions():
+        active.setdefault(event, []).append(_name(func))
+    return active
+
+
+def _expose_command(name: str, func: Callable) -> None:
+    if qtile is None:
+        # e.g. when running qtile check
+        return
+    if isinstance(getattr(qtile, "_commands", None), dict):
+        qtile._commands[name] = func
+    else:
+        # Older versions of Qtile look up commands by their cmd_ prefix
+        setattr(qtile, f"cmd_{name}", func)
+
+
+_expose_command("hook_subscriptions", subscriptions)
@@ -0,0 +1,170 @@
+"""
+Keymap
+======
+
+When the config is reloaded Qtile ungrabs every key and then grabs each one in the new
+keymap, which on X11 is a round of requests to the X server per binding.
+
+``build`` turns the config's ``(mods, key, command, description)`` table into ``Key``
+objects, reusing the ``Key`` from the last load for each binding that hasn't changed.
+Qtile's key grabbing is then wrapped so that ungrabbing all keys only forgets them, a
+key that was already grabbed isn't grabbed again, and once the new keymap is in place
+the keys that are no longer bound are ungrabbed. This also applies when entering and
+leaving key chords.
+
+The built keys and those waiting to be ungrabbed are kept on the Qtile object (see
+``persist``), as this module is executed again when the config is reloaded if it has
+changed.
+
+After a reload, the log shows how many grabs were changed and the time taken, next to
+how long grabbing the whole keymap took at startup.
+"""
+
+from __future__ import annotations
+
+import time
+from types import FunctionType, MethodType
+from typing import TYPE_CHECKING
+
+from libqtile import qtile
+from libqtile.config import Key
+from libqtile.log_utils import logger
+
+import persist
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+# (sorted modifiers, key) -> the Key last built for that binding
+_built: dict[tuple[tuple[str, ...], str], Key] = persist.persistent("keymap_built", dict)
+
+# Keys that are grabbed by the backend but were dropped from Qtile's keymap
+_held: dict[Key, tuple[int, int]] = persist.persistent("keymap_held", dict)
+
+# Whether the keymap is being reloaded, and the number of keys grabbed and the time
+# taken at startup
+_state: dict[str, Any] = persist.persistent(
+    "keymap_state", lambda: dict(reloading=False, startup=None)
+)
+_stats: dict[str, Any] = persist.persistent(
+    "keymap_stats", lambda: dict(grabbed=0, kept=0, time=0.0)
+)
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Whether two command arguments are equivalent, e.g. lazy calls built the same way."""
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, MethodType):
+        return a.__self__ is b.__self__ and _same(a.__func__, b.__func__)
+    if isinstance(a, FunctionType):
+        # A function defined again, e.g. a lambda made for each lazy call or a function
+        # in a reloaded module, is the same if its code and what it refers to are
+        return (
+            a.__code__ == b.__code__
+            and a.__globals__ is b.__globals__
+            and _same(a.__defaults__, b.__defaults__)
+            and _same(a.__kwdefaults__, b.__kwdefaults__)
+            and _same(_cells(a), _cells(b))
+        )
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if type(a).__module__.startswith("libqtile.") and hasattr(a, "__dict__"):
+        # Lazy calls and their command graph nodes don't define equality
+        return _same(vars(a), vars(b))
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _cells(func: FunctionType) -> list[Any]:
+    try:
+        return [cell.cell_contents for cell in func.__closure__ or ()]
+    except ValueError:
+        # An empty cell, which can't be compared
+        return [object()]
+
+
+def build(table: list[tuple[list[str], str, Any, str]]) -> list[Key]:
+    """Create the Keys for a keymap, reusing those of unchanged bindings."""
+    keys = []
+    for mods, key, cmd, desc in table:
+        old = _built.get((tuple(sorted(mods)), key))
+        if old is not None and old.desc == desc and _same(list(old.commands), [cmd]):
+            keys.append(old)
+        else:
+            keys.append(Key(mods, key, cmd, desc=desc))
+
+    _built.clear()
+    _built.update({(tuple(sorted(k.modifiers)), k.key): k for k in keys})
+    _state["reloading"] = bool(qtile is not None and qtile.keys_map)
+    return keys
+
+
+def _grab_key(key: Key) -> None:
+    syms = _held.pop(key, None)
+    if syms is None:
+        t = time.monotonic()
+        syms = qtile.core.grab_key(key)
+        _stats["time"] += time.monotonic() - t
+        _stats["grabbed"] += 1
+    else:
+        _stats["kept"] += 1
+
+    if syms in qtile.keys_map:
+        logger.warning("Key spec duplicated, overriding previous: %s", key)
+    qtile.keys_map[syms] = key
+
+
+def _ungrab_keys() -> None:
+    if _state["startup"] is None:
+        # Everything grabbed so far was grabbed while starting up
+        _state["startup"] = (_stats["grabbed"], _stats["time"])
+        _reset_stats()
+
+    # The keys are ungrabbed once we know which are still needed
+    if not _held:
+        qtile.call_soon(_ungrab_unused)
+    _held.update({key: syms for syms, key in qtile.keys_map.items()})
+    qtile.keys_map.clear()
+
+
+def _ungrab_unused() -> None:
+    t = time.monotonic()
+    ungrabbed = 0
+    for key, syms in _held.items():
+        if syms not in qtile.keys_map:
+            qtile.core.ungrab_key(key)
+            ungrabbed += 1
+    _held.clear()
+    _stats["time"] += time.monotonic() - t
+
+    startup = _state["startup"]
+    if _state["reloading"] and startup:
+        logger.info(
+            "Updated key grabs in %.1f ms: %d grabbed, %d ungrabbed, %d kept "
+            "(grabbing all %d keys at startup took %.1f ms)",
+            _stats["time"] * 1000,
+            _stats["grabbed"],
+            ungrabbed,
+            _stats["kept"],
+            startup[0],
+            startup[1] * 1000,
+        )
+    _state["reloading"] = False
+    _reset_stats()
+
+
+def _reset_stats() -> None:
+    _stats.update(grabbed=0, kept=0, time=0.0)
+
+
+if qtile is not None:
+    qtile.grab_key = _grab_key
+    qtile.ungrab_keys = _ungrab_keys
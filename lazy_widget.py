@@ -0,0 +1,94 @@
+"""
+Lazy widgets
+============
+
+Importing some widgets' modules is slow, e.g. ``qtile_extras.widget``, and all of it
+happens while the config is loading, before anything is drawn. A ``LazyWidget`` takes
+a widget's place in a bar, naming the widget's class rather than being given an
+instance:
+
+    battery = LazyWidget("battery.MyBattery", format="{char}")
+
+When its bar first draws, the class is imported and the widget created with the given
+config, and it replaces the placeholder in its bar. If the placeholder was given to
+more than one bar, its mirrors are replaced by mirrors of the new widget.
+
+Until then, the placeholder takes no space and commands sent to the widget by name
+fail.
+"""
+
+from __future__ import annotations
+
+import importlib
+import time
+from typing import TYPE_CHECKING
+
+from libqtile.log_utils import logger
+from libqtile.widget import base
+
+if TYPE_CHECKING:
+    from libqtile.bar import Bar
+
+
+class LazyWidget(base._Widget):
+    """A placeholder for a widget that is created when its bar first draws."""
+
+    def __init__(self, widget: str, **config):
+        self.widget_class = widget
+        self.widget_config = config
+        name = config.get("name", widget.rpartition(".")[2].lower())
+        base._Widget.__init__(self, 0, name=name)
+        self._loading = False
+
+    def draw(self):
+        # Bars draw their widgets in turn, so the bar is changed once it has finished
+        if not self._loading:
+            self._loading = True
+            self.qtile.call_soon(self._load)
+
+    def _load(self) -> None:
+        if not self.configured:
+            # Finalized in the meantime, e.g. by a config reload
+            return
+
+        start = time.monotonic()
+        module, _, name = self.widget_class.rpartition(".")
+        try:
+            cls = getattr(importlib.import_module(module), name)
+            widget = cls(**self.widget_config)
+        except Exception:
+            logger.exception("Could not create widget %s", self.widget_class)
+            return
+        created = time.monotonic()
+
+        placeholders = [(self.bar, self)]
+        if not _replace(self.bar, self, widget):
+            return
+        for mirror in list(self._mirrors):
+            if mirror.configured and _replace(mirror.bar, mirror, widget.create_mirror()):
+                placeholders.append((mirror.bar, mirror))
+
+        for bar, placeholder in placeholders:
+            placeholder.finalize()
+            bar.draw()
+
+        logger.info(
+            "Created lazy widget %s in %.1f ms (%.1f ms to import and create)",
+            self.widget_class,
+            (time.monotonic() - start) * 1000,
+            (created - start) * 1000,
+        )
+
+
+def _replace(bar: Bar, old: base._Widget, new: base._Widget) -> bool:
+    index = bar.widgets.index(old)
+    bar.widgets[index] = new
+    if not bar._configure_widget(new):
+        bar.widgets[index] = old
+        return False
+
+    for name, widget in list(bar.qtile.widgets_map.items()):
+        if widget is old:
+            del bar.qtile.widgets_map[name]
+    bar.qtile.register_widget(new)
+    return True
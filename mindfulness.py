@@ -18,22 +18,105 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
 import os
+import shutil
+import time
 from random import randint
 from urllib import request
 
-import gi
-
-gi.require_version("Gst", "1.0")
-from gi.repository import Gst
 from libqtile.log_utils import logger
 from libqtile.utils import get_cache_dir
 from libqtile.widget import base
 
-Gst.init(None)
+_Gst = None
+
+
+def _gst():
+    """Import and initialise GStreamer the first time a tone is played."""
+    global _Gst
+    if _Gst is None:
+        import gi
 
+        gi.require_version("Gst", "1.0")
+        from gi.repository import Gst
 
-class ReMindfulness(base.ThreadPoolText):
+        Gst.init(None)
+        _Gst = Gst
+    return _Gst
+
+
+class TonePlayer:
+    """
+    Plays an audio file again and again with one pipeline. Between plays the pipeline is
+    kept paused at the start, with the file open and the decoder ready, so playing
+    starts straight away. End of stream is picked up from the pipeline's bus by the
+    asyncio event loop.
+    """
+
+    def __init__(self, path: str):
+        Gst = _gst()
+        self.plays = 0
+        self._watching = False
+        self._playbin = Gst.ElementFactory.make("playbin", "mindfulness")
+        self._playbin.props.uri = "file://" + path
+        # Audio only
+        self._playbin.props.flags = 0x2
+        self._bus = self._playbin.get_bus()
+        self._fd = self._bus.get_pollfd().fd
+        self._playbin.set_state(Gst.State.PAUSED)
+
+    def play(self) -> None:
+        """Play the tone from the start. This must be called from the event loop."""
+        Gst = _gst()
+        if not self._watching:
+            asyncio.get_running_loop().add_reader(self._fd, self._on_bus)
+            self._watching = True
+        _, state, _ = self._playbin.get_state(0)
+        if state == Gst.State.PLAYING:
+            self._rewind()
+        self._playbin.set_state(Gst.State.PLAYING)
+
+    def _rewind(self) -> None:
+        Gst = _gst()
+        self._playbin.set_state(Gst.State.PAUSED)
+        self._playbin.seek_simple(
+            Gst.Format.TIME, Gst.SeekFlags.FLUSH | Gst.SeekFlags.KEY_UNIT, 0
+        )
+
+    def _on_bus(self) -> None:
+        Gst = _gst()
+        while message := self._bus.pop():
+            if message.type == Gst.MessageType.EOS:
+                self.plays += 1
+                self._rewind()
+            elif message.type == Gst.MessageType.ERROR:
+                error, _ = message.parse_error()
+                logger.error("Could not play mindfulness tone: %s", error.message)
+                self._rewind()
+
+    def close(self) -> None:
+        if self._watching:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._watching = False
+        self._playbin.set_state(_gst().State.NULL)
+
+
+def _copy_url(url: str, path: str) -> None:
+    # Written to a temporary file first so a partial download is never used
+    partial = path + ".part"
+    with request.urlopen(url) as response, open(partial, "wb") as f:
+        shutil.copyfileobj(response, f)
+    os.replace(partial, path)
+
+
+async def fetch_audio(url: str, path: str) -> None:
+    """Fetch a file, which can be a file:// URL, to path without blocking the event loop."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    await asyncio.get_running_loop().run_in_executor(None, _copy_url, url, path)
+
+
+class ReMindfulness(base._TextBox):
     """
     Mindfulness reminder widget (Proof of concept / work in progress)
 
@@ -42,8 +125,11 @@ class ReMindfulness(base.ThreadPoolText):
     calming tone at semi-random intervals.
 
     Note, if the specified audio_file does not exist (i.e. the first time the widget is
-    configured, leaving the default value for ``audio_file``), one will be downloaded.
-    It is fetched via the mindfulnotifier app's github repository.
+    configured, leaving the default value for ``audio_file``), one will be fetched from
+    ``audio_url``, which by default is in the mindfulnotifier app's github repository.
+
+    Each reminder is a single timer on the event loop, set when the previous reminder
+    fires, so nothing runs in between.
     """
 
     default_path = os.path.join(get_cache_dir(), "tibetan_bell_ding_b.mp3")
@@ -51,6 +137,7 @@ class ReMindfulness(base.ThreadPoolText):
 
     defaults = [
         ("audio_file", default_path, "Lower bound for the interval between reminders"),
+        ("audio_url", default_url, "Where to fetch audio_file from if it doesn't exist"),
         ("interval_minimum", 60 * 60, "Lower bound for the interval between reminders"),
         ("interval_maximum", 90 * 60, "Upper bound for the interval between reminders"),
         ("reminder_background", "ff0000", "Background colour when reminding"),
@@ -60,9 +147,11 @@ class ReMindfulness(base.ThreadPoolText):
     ]
 
     def __init__(self, text="", **config):
-        base.ThreadPoolText.__init__(self, text, **config)
+        base._TextBox.__init__(self, text, **config)
         self.add_defaults(ReMindfulness.defaults)
-        self._just_started = True
+        self._player = None
+        self._fetch = None
+        self.next_reminder = None
         self._original_foreground = self.foreground
         self._original_background = self.background
 
@@ -73,29 +162,55 @@ class ReMindfulness(base.ThreadPoolText):
         )
 
     def _configure(self, qtile, bar):
-        self._just_started = not self.configured
-        base.ThreadPoolText._configure(self, qtile, bar)
-
-    def poll(self):
-        self.update_interval = randint(self.interval_minimum, self.interval_maximum)
-
-        if self._just_started:
-            return self.text
-
+        base._TextBox._configure(self, qtile, bar)
+        if self._fetch is None:
+            self._fetch = asyncio.create_task(self._prepare())
+        if self.next_reminder is None:
+            self._schedule()
+
+    async def _prepare(self):
+        # Get the tone ready well before the first reminder
         if not os.path.exists(self.audio_file):
-            logger.info("Downloading default tone for ReMindfulness widget")
-            request.urlretrieve(self.default_url, self.audio_file)
-
-        playbin = Gst.ElementFactory.make("playbin", "playbin")
-        playbin.props.uri = "file://" + self.audio_file
-        playbin.set_state(Gst.State.PLAYING)
+            logger.info("Fetching tone for ReMindfulness widget from %s", self.audio_url)
+            try:
+                await fetch_audio(self.audio_url, self.audio_file)
+            except OSError:
+                logger.exception("Could not fetch tone for ReMindfulness widget")
+                return
+        self._player = TonePlayer(self.audio_file)
+
+    def _schedule(self):
+        delay = randint(self.interval_minimum, self.interval_maximum)
+        self.next_reminder = time.time() + delay
+        self.timeout_add(delay, self._remind)
+
+    def _remind(self):
+        self._schedule()
+
+        if self._player is not None:
+            self._player.play()
+        elif self._fetch.done():
+            # The tone couldn't be fetched before, so try again for next time
+            self._fetch = asyncio.create_task(self._prepare())
 
         self.foreground = self.reminder_foreground
         self.background = self.reminder_background
+        self.draw()
         self.timeout_add(self.reminder_duration, self._reset_colours)
 
-        return self.text
-
     def _reset_colours(self):
         self.foreground = self._original_foreground
         self.background = self._original_background
+        self.draw()
+
+    def finalize(self):
+        # The widget can be configured again, e.g. when its screen is re-added, which
+        # prepares the tone and schedules a reminder again
+        if self._fetch is not None:
+            self._fetch.cancel()
+            self._fetch = None
+        if self._player is not None:
+            self._player.close()
+            self._player = None
+        self.next_reminder = None
+        base._TextBox.finalize(self)
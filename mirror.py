@@ -0,0 +1,145 @@
+"""
+Mirrored widgets
+================
+
+When a widget is given to more than one bar, Qtile puts a ``Mirror`` of it in each
+extra bar. Every time the widget draws, it lays out and renders its text again and each
+mirror replays those drawing operations, and for widgets with calculated widths the
+mirror's whole bar is redrawn.
+
+``RenderOnce`` remembers what a text widget last rendered, so that it can report
+``is_clean()`` (see ``damage``). While the widget has mirrors, it also keeps a rasterised
+copy of it, and only renders again when its content or scroll position changes.
+Otherwise, e.g. when its bar is redrawn, it just paints the copy. The copy's surface is
+reused for as long as the widget's size stays the same. ``CachedMirror`` paints that
+same copy, and mirrors are only updated when there is something new to show, redrawing
+their bar only if their width changed.
+
+A widget without mirrors draws as usual, without the copy. Neither does a scroll step,
+which leaves the mirrors to replay the drawer's recording as Qtile's ``Mirror`` does.
+"""
+
+from __future__ import annotations
+
+import cairocffi
+from libqtile import bar
+from libqtile.widget.base import Mirror
+
+
+class RenderOnce:
+    """Mixin for text widgets, which must come before the widget class."""
+
+    _image: cairocffi.ImageSurface | None = None
+    _render_key: tuple | None = None
+    _render_offset: int = 0
+    render_count: int = 0
+
+    def _content_key(self) -> tuple:
+        return (
+            self.text,
+            self.length,
+            self.bar.height,
+            self.foreground,
+            self.background,
+            self.font,
+            self.fontsize,
+            getattr(self.layout, "colour", None),
+        )
+
+    def _scroll_position(self) -> int:
+        # Kept out of the content key: a scroll step only needs the copy repainting
+        return getattr(self, "_scroll_offset", 0)
+
+    def is_clean(self) -> bool:
+        """Whether what was last drawn is still up to date."""
+        return (
+            self._render_key is not None
+            and self._content_key() == self._render_key
+            and self._scroll_position() == self._render_offset
+        )
+
+    def paint_image(self, drawer) -> None:
+        """Paint the last rendered content onto a drawer."""
+        drawer.ctx.save()
+        drawer.ctx.set_operator(cairocffi.OPERATOR_SOURCE)
+        drawer.ctx.set_source_surface(self._image)
+        drawer.ctx.paint()
+        drawer.ctx.restore()
+
+    def draw(self):
+        if not self.can_draw():
+            return
+
+        if self._image is not None and self.is_clean():
+            self.paint_image(self.drawer)
+            self.draw_at_default_position()
+            return
+
+        key = self._content_key()
+        scrolled = key == self._render_key and self._scroll_position() != self._render_offset
+        super().draw()
+
+        if self._mirrors and not scrolled:
+            # Qtile keeps a recording of the drawing operations for the mirrors
+            self._rasterise()
+        else:
+            self._image = None
+        self._render_key = key
+        self._render_offset = self._scroll_position()
+        self.render_count += 1
+
+    def _rasterise(self) -> None:
+        width = max(self.length, 1)
+        image = self._image
+        if image is None or (image.get_width(), image.get_height()) != (width, self.bar.height):
+            image = self._image = cairocffi.ImageSurface(
+                cairocffi.FORMAT_ARGB32, width, self.bar.height
+            )
+        with cairocffi.Context(image) as ctx:
+            # Replaces everything that was there before
+            ctx.set_operator(cairocffi.OPERATOR_SOURCE)
+            ctx.set_source_surface(self.drawer.last_surface)
+            ctx.paint()
+
+    def create_mirror(self):
+        return CachedMirror(self, background=self.background)
+
+    def _draw_with_mirrors(self):
+        count = self.render_count
+        self._old_draw()
+        if self.render_count == count:
+            # Nothing new for the mirrors, and they repaint themselves with their bars
+            return
+
+        for mirror in self._mirrors:
+            if not mirror.configured:
+                continue
+            if (
+                mirror.length_type == bar.CALCULATED
+                and mirror.bar is not self.bar
+                and mirror.length != getattr(mirror, "drawn_length", None)
+            ):
+                mirror.bar.draw()
+            else:
+                mirror.draw()
+
+
+class CachedMirror(Mirror):
+    """A Mirror that paints its widget's rasterised content."""
+
+    drawn_length: int | None = None
+    painted_count: int = -1
+
+    def is_clean(self) -> bool:
+        return self.painted_count == self.reflects.render_count and self.reflects.is_clean()
+
+    def draw(self):
+        if self.length <= 0:
+            return
+        if self.reflects._image is None:
+            Mirror.draw(self)
+        else:
+            self.reflects.paint_image(self.drawer)
+            self.draw_at_default_position()
+        self.drawn_length = self.length
+        self.painted_count = self.reflects.render_count
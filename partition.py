@@ -0,0 +1,66 @@
+"""
+Group partitions
+================
+
+With more than one screen, the groups are split into contiguous runs, one per screen,
+as evenly as possible: 8 groups on 2 screens go 4 and 4, on 3 screens 3, 3 and 2. With
+one screen, all groups belong to it.
+
+Lookup tables are built whenever the number of screens changes so that finding a
+group's screen, the groups on a screen, or the next or previous group on the same
+screen are all dict or list lookups.
+"""
+
+from __future__ import annotations
+
+
+class Partition:
+    """The groups, by name, split between the screens."""
+
+    def __init__(self, names: list[str]):
+        self.names = list(names)
+        self.screens = 0
+        self._members: list[list[str]] = []
+        self._screen_of: dict[str, int] = {}
+        self._ring: dict[str, tuple[list[str], int]] = {}
+        self.update(1)
+
+    def update(self, screens: int) -> None:
+        """Split the groups between a number of screens."""
+        screens = max(screens, 1)
+        if screens == self.screens:
+            return
+        self.screens = screens
+
+        parts = min(screens, len(self.names))
+        size, extra = divmod(len(self.names), parts) if parts else (0, 0)
+        self._members = []
+        start = 0
+        for i in range(parts):
+            end = start + size + (i < extra)
+            self._members.append(self.names[start:end])
+            start = end
+
+        self._screen_of = {}
+        self._ring = {}
+        for screen, members in enumerate(self._members):
+            for index, name in enumerate(members):
+                self._screen_of[name] = screen
+                self._ring[name] = (members, index)
+
+    def screen_of(self, name: str) -> int | None:
+        """The index of the screen a group belongs to, if it is one of the partitioned groups."""
+        return self._screen_of.get(name)
+
+    def groups_on(self, screen: int) -> list[str]:
+        """The names of the groups belonging to a screen."""
+        if screen < len(self._members):
+            return self._members[screen]
+        return []
+
+    def step(self, name: str, direction: int) -> str | None:
+        """The group ``direction`` places along from a group, wrapping within its screen."""
+        if name not in self._ring:
+            return None
+        members, index = self._ring[name]
+        return members[(index + direction) % len(members)]
@@ -0,0 +1,38 @@
+"""
+Persistent state
+================
+
+Qtile reloads the modules in the config directory when the config is reloaded (see
+``reloader``), which executes them again and rebinds their globals. State that has to
+outlive a reload is kept on the Qtile object instead:
+
+    _built = persist.persistent("keymap_built", dict)
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from libqtile import qtile
+
+if TYPE_CHECKING:
+    from typing import Callable, TypeVar
+
+    T = TypeVar("T")
+
+
+def persistent(name: str, factory: Callable[[], T]) -> T:
+    """
+    The object stored on the Qtile object under a name, which is created with
+    ``factory`` the first time it is asked for.
+    """
+    attr = f"_config_{name}"
+    if qtile is None:
+        # e.g. when running qtile check with an older Qtile
+        return factory()
+    value = getattr(qtile, attr, None)
+    if value is None:
+        value = factory()
+        setattr(qtile, attr, value)
+    return value
@@ -0,0 +1,184 @@
+"""
+Window placement
+================
+
+A few new windows are moved or resized once they are managed:
+
+ - Firefox's sharing indicator goes to the top of the screen, without a border
+ - LibreOffice's start center is put in a fixed spot on the current screen
+ - mpv is shrunk to fit the screen if it has sized itself too big
+
+``place_window`` is subscribed to ``client_managed`` as a plain function. Qtile runs an
+``async`` hook function as a new task on the event loop, which costs far more than the
+checks themselves for a function that never awaits anything.
+
+Running this file directly replays synthetic window mappings through the ``async`` hook
+function this replaced, as Qtile fires it, and through ``place_window``, and prints the
+time each takes:
+
+    python placement.py 100000
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+def place_window(win: Any, screen: Any) -> None:
+    """Place a new window if it is one of those above. screen is the current screen."""
+    name = win.name
+    if name == "Firefox — Sharing Indicator":
+        win.place(win.x + win.borderwidth, 0, win.width, win.height, 0, None)
+        return
+
+    wm_class = win.get_wm_class() or ()
+    if name == "Navigator" and "libreoffice-startcenter" in wm_class:
+        win.place(screen.x, 240, 450, 600, win.borderwidth, win.bordercolor)
+    elif "mpv" in wm_class:
+        _clamp_to_screen(win, screen)
+
+
+def _clamp_to_screen(win: Any, screen: Any) -> None:
+    # Only one dimension is clamped, which is all mpv needs
+    if win.height > screen.height:
+        x = win.x
+        y = screen.y
+        w = win.width
+        h = screen.height
+    elif win.width > screen.width:
+        x = screen.x
+        y = win.y
+        w = screen.width
+        h = win.height
+    else:
+        return
+    bw = win.borderwidth
+    win.place(x - bw, y - bw, w + 2 * bw, h + 2 * bw, 0, None)
+
+
+def benchmark(count: int) -> tuple[float, float]:
+    """
+    Replay synthetic window mappings through the async hook function that place_window
+    replaced, as Qtile fires it, and through place_window. Returns the time taken by
+    each, in seconds.
+    """
+    import asyncio
+    import random
+    import time
+
+    class Screen:
+        x = y = 0
+        width = 1920
+        height = 1080
+
+    class Window:
+        def __init__(self, name, wm_class, width, height):
+            self.name = name
+            self.wm_class = wm_class
+            self.x = self.y = 100
+            self.width = width
+            self.height = height
+            self.borderwidth = 2
+            self.bordercolor = "ff0000"
+            self.placed = None
+
+        def get_wm_class(self):
+            return self.wm_class
+
+        def place(self, *args):
+            self.placed = args
+
+    screen = Screen()
+
+    class Qtile:
+        current_screen = screen
+
+    qtile = Qtile()
+
+    async def old_place_windows(win):
+        if win.name == "Firefox — Sharing Indicator":
+            win.place(win.x + win.borderwidth, 0, win.width, win.height, 0, None)
+            return
+
+        wm_class = win.get_wm_class() or []
+        if win.name == "Navigator" and "libreoffice-startcenter" in wm_class:
+            x = qtile.current_screen.x
+            win.place(x, 240, 450, 600, win.borderwidth, win.bordercolor)
+            return
+
+        if "mpv" in wm_class:
+            sw = qtile.current_screen.width
+            sh = qtile.current_screen.height
+            x = y = w = h = None
+            if win.height > sh:
+                h = sh
+                y = qtile.current_screen.y
+            if win.width > sw:
+                w = sw
+                x = qtile.current_screen.x
+            if w is not None or h is not None:
+                if h is None:
+                    h = win.height
+                    y = win.y
+                else:
+                    w = win.width
+                    x = win.x
+                bw = win.borderwidth
+                win.place(x - bw, y - bw, w + 2 * bw, h + 2 * bw, 0, None)
+            return
+
+    def new_place_windows(win):
+        place_window(win, qtile.current_screen)
+
+    samples = [
+        ("Firefox — Sharing Indicator", ["firefox"]),
+        ("Navigator", ["libreoffice-startcenter", "LibreOffice"]),
+        ("video.mkv - mpv", ["mpv"]),
+        ("~ - foot", ["foot"]),
+        ("Mozilla Firefox", ["firefox", "Firefox"]),
+        ("Inbox - Evolution", ["evolution"]),
+    ]
+    rng = random.Random(0)
+    windows = []
+    for _ in range(count):
+        name, wm_class = rng.choice(samples)
+        size = rng.choice([(800, 600), (2000, 600), (800, 1200), (2000, 1200)])
+        windows.append(Window(name, wm_class, *size))
+
+    async def replay():
+        # As libqtile.hook fires each kind of hook function
+        tasks = []
+        start = time.perf_counter()
+        for win in windows:
+            tasks.append(asyncio.create_task(old_place_windows(win)))
+        await asyncio.gather(*tasks)
+        old = time.perf_counter() - start
+
+        expected = [win.placed for win in windows]
+        for win in windows:
+            win.placed = None
+
+        start = time.perf_counter()
+        for win in windows:
+            new_place_windows(win)
+        new = time.perf_counter() - start
+
+        for win, placed in zip(windows, expected):
+            assert win.placed == placed, f"Placements differ for {win.name}: {win.placed} != {placed}"
+        return old, new
+
+    return asyncio.run(replay())
+
+
+if __name__ == "__main__":
+    import sys
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    old, new = benchmark(count)
+    print(f"{count} windows")
+    print(f"async hook function: {old * 1000:.2f} ms")
+    print(f"place_window:        {new * 1000:.2f} ms")
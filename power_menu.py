@@ -1,11 +1,50 @@
+"""
+Power menu
+==========
+
+The popup is built the first time it is shown and then kept, hidden, for later. Its
+icons are rasterised and its text laid out once, so showing it again only needs it to
+be drawn. It is built again if one of the icon files or the output's scale changes, and
+is destroyed when the config is reloaded (see ``destroy_power_menu``).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
 from libqtile.lazy import lazy
+from libqtile.log_utils import logger
 from qtile_extras.popup.toolkit import PopupImage, PopupRelativeLayout, PopupText
 
+import persist
 
-def show_power_menu(qtile):
+if TYPE_CHECKING:
+    from typing import Any
+
+ICONS = {
+    name: os.path.expanduser(f"~/pictures/icons/{name}.svg")
+    for name in ("lock", "sleep", "shutdown")
+}
+
+
+class _PowerMenu(PopupRelativeLayout):
+    """A popup layout that is hidden rather than destroyed when it is closed."""
+
+    def kill(self):
+        # show() subscribes these again
+        if self.keyboard_navigation:
+            self.unset_hooks()
+        self.hide()
+
+    def destroy(self):
+        PopupRelativeLayout.kill(self)
+
+
+def _build(qtile) -> _PowerMenu:
     controls = [
         PopupImage(
-            filename="~/pictures/icons/lock.svg",
+            filename=ICONS["lock"],
             pos_x=0.15,
             pos_y=0.1,
             width=0.1,
@@ -13,7 +52,7 @@ def show_power_menu(qtile):
             mouse_callbacks={"Button1": lazy.spawn("swaylock")},
         ),
         PopupImage(
-            filename="~/pictures/icons/sleep.svg",
+            filename=ICONS["sleep"],
             pos_x=0.45,
             pos_y=0.1,
             width=0.1,
@@ -21,7 +60,7 @@ def show_power_menu(qtile):
             mouse_callbacks={"Button1": lazy.spawn("systemctl suspend", shell=True)},
         ),
         PopupImage(
-            filename="~/pictures/icons/shutdown.svg",
+            filename=ICONS["shutdown"],
             pos_x=0.75,
             pos_y=0.1,
             width=0.1,
@@ -44,14 +83,57 @@ def show_power_menu(qtile):
             h_align="center",
         ),
     ]
-    PopupRelativeLayout(
+    return _PowerMenu(
         qtile,
         width=1000,
         height=200,
         controls=controls,
         background="000000c0",
         initial_focus=2,
-    ).show(centered=True)
+    )
+
+
+def _output_scale(qtile) -> float:
+    # Only Wayland outputs have a scale
+    for output in getattr(qtile.core, "outputs", []):
+        if getattr(output, "screen", None) is qtile.current_screen:
+            return output.wlr_output.scale
+    return 1.0
+
+
+def _cache_key(qtile) -> tuple:
+    mtimes = []
+    for path in ICONS.values():
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return (*mtimes, _output_scale(qtile))
+
+
+# The popup and what it was built from, kept on the Qtile object so that the popup
+# built by a previous config can be destroyed even if this module was reloaded
+_cache: dict[str, Any] = persist.persistent(
+    "power_menu", lambda: dict(menu=None, key=None)
+)
+
+
+def destroy_power_menu() -> None:
+    """Destroy the popup if it has been built, e.g. when the config is reloaded."""
+    if _cache["menu"] is not None:
+        _cache["menu"].destroy()
+        _cache["menu"] = _cache["key"] = None
+
+
+def show_power_menu(qtile):
+    key = _cache_key(qtile)
+    if _cache["menu"] is None or key != _cache["key"]:
+        if _cache["menu"] is not None:
+            logger.info("Rebuilding the power menu")
+        destroy_power_menu()
+        _cache["menu"] = _build(qtile)
+        _cache["key"] = key
+    _cache["menu"].show(centered=True)
 
 
 keys_power_menu = [
@@ -0,0 +1,263 @@
+"""
+Config reloading
+================
+
+When the config is reloaded, Qtile reloads every module in the config directory before
+config.py. Importing this module replaces that step, so that only the config modules
+whose source has changed since they were loaded are reloaded, along with the config
+modules that import them (as they may hold objects from the old version). Everything
+else, and the state it holds, is left alone. This module and ``hooks`` are never
+reloaded, as they hold the state needed to reload the others; changes to them need a
+restart.
+
+A module counts as changed when its file's mtime differs and its contents hash
+differently. How long each reload takes is logged.
+
+Qtile clears all hook subscriptions when reloading, so the hooks subscribed by modules
+that aren't reloaded are subscribed again (see ``hooks``).
+
+config.py imports this module before the other config modules, and calls
+``record_loaded`` once it has finished, so that modules imported for the first time are
+tracked from then on. What has been loaded is kept on the Qtile object (see
+``persist``).
+
+Config modules are also timed as they are executed, and ``record_loaded`` logs a report
+in the format of ``python -X importtime``, in microseconds. A module's self time
+includes anything it imports from outside the config, so slow third-party imports show
+up against the config module that needs them. Modules imported after the config has
+loaded, e.g. by ``lazy_widget``, are logged as they are imported.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib
+import importlib.abc
+import importlib.machinery
+import os
+import sys
+import time
+from graphlib import TopologicalSorter
+
+from libqtile import qtile
+from libqtile.log_utils import logger
+
+import hooks
+import persist
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module name -> (mtime, hash) of the source that is currently loaded
+_loaded: dict[str, tuple[float, str]] = persist.persistent("reloader_loaded", dict)
+
+# Hash -> names of modules imported by that source
+_imports: dict[str, set[str]] = persist.persistent("reloader_imports", dict)
+
+# (module name, self time, cumulative time, depth) for each config module executed
+_import_times: list[tuple[str, float, float, int]] = []
+
+# Time spent executing nested config modules, for each config module being executed
+_import_stack: list[float] = []
+
+# When the config started loading, if it is loading. The first load starts with the
+# import of this module.
+_load_start: float | None = time.perf_counter()
+
+
+class _TimedLoader:
+    """Wraps a config module's loader to time its execution."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Its hook functions are subscribed again as it is executed
+        hooks.forget(module.__name__)
+        _import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            nested = _import_stack.pop()
+            if _import_stack:
+                _import_stack[-1] += total
+
+        name = module.__name__
+        if name == "config":
+            # Timed as a whole by record_loaded, and reloaded by Qtile itself
+            return
+        if _load_start is None and not _import_stack:
+            logger.info("Imported config module %s in %.1f ms", name, total * 1000)
+        else:
+            _import_times.append((name, total - nested, total, len(_import_stack)))
+        if name not in _loaded and module.__file__:
+            _loaded[name] = _digest(name, module.__file__)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Finds the modules in the config directory, with their loaders wrapped."""
+
+    def __init__(self, config_dir: str):
+        self.config_dir = config_dir
+
+    def find_spec(self, name, path=None, target=None):
+        if path is not None:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, [self.config_dir])
+        if spec is not None and spec.loader is not None:
+            spec.loader = _TimedLoader(spec.loader)
+        return spec
+
+
+def _install_finder(config_dir: str) -> None:
+    for finder in sys.meta_path:
+        if isinstance(finder, _TimingFinder):
+            finder.config_dir = config_dir
+            return
+    sys.meta_path.insert(0, _TimingFinder(config_dir))
+
+
+def _config_modules(config_dir: str) -> dict[str, str]:
+    """The loaded modules that live in the config directory, excluding config itself."""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == config_dir:
+            # These hold the state needed to reload the others
+            if name not in ("config", __name__, hooks.__name__, persist.__name__):
+                modules[name] = path
+    return modules
+
+
+def _digest(name: str, path: str) -> tuple[float, str]:
+    mtime = os.stat(path).st_mtime
+    loaded = _loaded.get(name)
+    if loaded and loaded[0] == mtime:
+        return loaded
+    with open(path, "rb") as f:
+        source = f.read()
+    return mtime, hashlib.sha1(source).hexdigest()
+
+
+def _imported_names(path: str, digest: str) -> set[str]:
+    if digest not in _imports:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name.partition(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module.partition(".")[0])
+        _imports[digest] = names
+    return _imports[digest]
+
+
+def _report() -> None:
+    lines = ["import time:       self [us] | cumulative | config module"]
+    for name, own, total, depth in _import_times:
+        indent = "  " * depth
+        lines.append(f"import time: {own * 1e6:>10.0f} | {total * 1e6:>10.0f} | {indent}{name}")
+    _import_times.clear()
+    if _load_start is not None:
+        elapsed = (time.perf_counter() - _load_start) * 1000
+        lines.append(f"config.py took {elapsed:.1f} ms from its first config import")
+    logger.info("\n".join(lines))
+
+
+def record_loaded(config_dir: str) -> None:
+    """
+    Start tracking config modules that have been imported for the first time, and log
+    how long config modules took to execute.
+    """
+    global _load_start
+    for name, path in _config_modules(os.path.abspath(config_dir)).items():
+        if name not in _loaded:
+            _loaded[name] = _digest(name, path)
+    _report()
+    _load_start = None
+
+
+def reload_changed(config_dir: str) -> list[str]:
+    """Reload changed config modules and their dependents. Returns their names."""
+    global _load_start
+    _load_start = time.perf_counter()
+    _install_finder(os.path.abspath(config_dir))
+
+    start = time.monotonic()
+    modules = _config_modules(os.path.abspath(config_dir))
+
+    digests = {}
+    changed = set()
+    for name, path in modules.items():
+        try:
+            digests[name] = _digest(name, path)
+        except OSError:
+            # Deleted modules can't be reloaded; whatever imports them will fail loudly
+            continue
+        if name not in _loaded or _loaded[name][1] != digests[name][1]:
+            changed.add(name)
+        else:
+            # Same contents with a new mtime, e.g. the file was touched
+            _loaded[name] = digests[name]
+
+    # Each module's config modules dependencies
+    graph = {
+        name: _imported_names(modules[name], digest[1]) & digests.keys()
+        for name, digest in digests.items()
+    }
+
+    # Reload the changed modules and anything that depends on them
+    to_reload = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for name, deps in graph.items():
+            if name not in to_reload and deps & to_reload:
+                to_reload.add(name)
+                grew = True
+
+    order = TopologicalSorter({name: graph[name] & to_reload for name in to_reload})
+    reloaded = []
+    for name in order.static_order():
+        t = time.monotonic()
+        importlib.reload(sys.modules[name])
+        _loaded[name] = digests[name]
+        reloaded.append(name)
+        logger.info(
+            "Reloaded config module %s in %.1f ms%s",
+            name,
+            (time.monotonic() - t) * 1000,
+            "" if name in changed else " (imports a changed module)",
+        )
+
+    # Qtile executes config.py itself once this returns
+    hooks.resubscribe(executing={"config"})
+
+    logger.info(
+        "Reloaded %d of %d config modules in %.1f ms",
+        len(reloaded),
+        len(digests),
+        (time.monotonic() - start) * 1000,
+    )
+    return reloaded
+
+
+def _reload_config_submodules(path) -> None:
+    # Replaces Config._reload_config_submodules, which reloads every config module
+    reload_changed(os.path.dirname(os.path.abspath(path)))
+
+
+# Time the config modules imported from here on
+_install_finder(CONFIG_DIR)
+
+if getattr(qtile, "config", None) is not None:
+    qtile.config._reload_config_submodules = _reload_config_submodules
@@ -5,13 +5,27 @@ Scratchpad and DropDowns
 The scratchpads are the same with either backend, but the terminal used differs. I
 prefer these terminals over something like alacritty, which would be an easier
 alternative to configure because it works under both Wayland and X.
+
+The DropDowns named in ``prewarm`` are spawned hidden in the background once Qtile has
+started, one every ``prewarm_stagger`` seconds after ``prewarm_delay``, so that the
+first time they are toggled they are shown straight away.
+
+Each DropDown's terminal is opened through a terminal server when there is one (see
+``terminal``). How long each DropDown takes from being spawned to its window appearing
+is logged, and kept in ``spawn_latencies``.
 """
 
 import os
+import shutil
+import time
 
 from libqtile import qtile
-from libqtile.config import DropDown, ScratchPad
+from libqtile.config import DropDown, Match, ScratchPad
 from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+import hooks
+import terminal
 
 HOME: str = os.path.expanduser("~")
 IS_WAYLAND: bool = qtile.core.name == "wayland"
@@ -20,9 +34,12 @@ mod = "mod1" if IS_XEPHYR else "mod4"
 
 
 if IS_WAYLAND:
-    term = "foot "
+    term = terminal.FOOT
+elif not IS_XEPHYR and shutil.which("urxvtd"):
+    # urxvt doesn't like xephyr
+    term = terminal.URXVT
 else:
-    term = "xterm -e "
+    term = terminal.XTERM
 
 
 conf = {
@@ -34,42 +51,136 @@ conf = {
 GHCI = "ghci"
 # GHCI = "ghci-9.2.2"
 
+# Name -> app ID given to each DropDown's window, by which it is matched
+app_ids = {name: f"dropdown-{name}" for name in ["tmux", "ncmpcpp", "python", GHCI]}
+
+
+def _dropdown(name, cmd, **config):
+    app_id = app_ids[name]
+    return DropDown(
+        name, term.command(app_id, cmd), match=Match(wm_class=app_id), **config, **conf
+    )
+
+
 dropdowns = [
-    DropDown("tmux", term + "tmux", height=0.4, **conf),
-    DropDown(
-        "ncmpcpp", term + "ncmpcpp", x=0.12, y=0.2, width=0.56, height=0.7, **conf
-    ),
-    DropDown("python", term + "python", x=0.05, y=0.1, width=0.2, height=0.3, **conf),
-    DropDown(GHCI, term + GHCI, y=0.6, height=0.4, **conf),
+    _dropdown("tmux", "tmux", height=0.4),
+    _dropdown("ncmpcpp", "ncmpcpp", x=0.12, y=0.2, width=0.56, height=0.7),
+    _dropdown("python", "python", x=0.05, y=0.1, width=0.2, height=0.3),
+    _dropdown(GHCI, GHCI, y=0.6, height=0.4),
 ]
 
+scratchpad = ScratchPad("scratchpad", dropdowns)
+
+# Name -> when it was spawned, for DropDowns whose windows haven't appeared yet
+_spawned_at = {}
+
+# Name -> seconds taken from spawning each DropDown to its window appearing
+spawn_latencies = {}
+
+
+def _ensure_server():
+    # Under Wayland the foot server is one of the session's services (see session.py),
+    # which restarts it if it exits
+    if not IS_WAYLAND:
+        term.ensure_server()
+
+
+def _spawn(group, name):
+    _ensure_server()
+    _spawned_at[name] = time.monotonic()
+    group.dropdown_toggle(name)
+
+
+def _toggle(qtile, name):
+    group = qtile.groups_map[scratchpad.name]
+    if name in group.dropdowns:
+        group.dropdown_toggle(name)
+    else:
+        _spawn(group, name)
+
 
 # Keybindings to open each DropDown
 keys_scratchpad = [
     (
         [mod, "shift"],
         "Return",
-        lazy.group["scratchpad"].dropdown_toggle("tmux"),
+        lazy.function(_toggle, "tmux"),
         "Toggle tmux scratchpad",
     ),
     (
         [mod, "control"],
         "m",
-        lazy.group["scratchpad"].dropdown_toggle("ncmpcpp"),
+        lazy.function(_toggle, "ncmpcpp"),
         "Toggle ncmpcpp scratchpad",
     ),
     (
         [mod],
         "c",
-        lazy.group["scratchpad"].dropdown_toggle("python"),
+        lazy.function(_toggle, "python"),
         "Toggle python scratchpad",
     ),
     (
         [mod],
         "g",
-        lazy.group["scratchpad"].dropdown_toggle(GHCI),
+        lazy.function(_toggle, GHCI),
         "Toggle GHCI scratchpad",
     ),
 ]
 
-scratchpad = ScratchPad("scratchpad", dropdowns)
+
+# DropDowns to spawn in the background after startup, and when to spawn them
+prewarm = ["tmux", "python", GHCI]
+prewarm_delay = 10
+prewarm_stagger = 3
+
+# Names of the DropDowns being prewarmed, and the window focussed when each one's window
+# appeared
+_prewarming = {}
+
+
+def _prewarm(name):
+    group = qtile.groups_map.get(scratchpad.name)
+    if group is None or name in group.dropdowns:
+        return
+    logger.info("Prewarming %s dropdown", name)
+    # The ScratchPad hides the window as soon as it takes it, before it is mapped, as it
+    # does for hidden DropDowns when Qtile restarts
+    group._to_hide.append(name)
+    _prewarming[name] = None
+    _spawn(group, name)
+
+
+@hooks.subscribe.startup_complete
+def _start_prewarming():
+    # Have the terminal server ready before any DropDowns are spawned
+    _ensure_server()
+    for i, name in enumerate(prewarm):
+        qtile.call_later(prewarm_delay + i * prewarm_stagger, _prewarm, name)
+
+
+def _prewarmed(window):
+    wm_class = window.get_wm_class() or []
+    return [name for name in _prewarming if app_ids[name] in wm_class]
+
+
+@hooks.subscribe.client_new
+def _check_prewarmed(window):
+    # This runs before the ScratchPad takes the window, which focusses it while showing it
+    for name in _prewarmed(window):
+        _prewarming[name] = qtile.current_window
+
+
+@hooks.subscribe.client_managed
+def _restore_focus(window):
+    for name in _prewarmed(window):
+        previous = _prewarming.pop(name)
+        if previous is not None and previous.group is not None:
+            previous.group.focus(previous)
+
+
+@hooks.subscribe.client_managed
+def _record_latency(window):
+    for name in [name for name in _spawned_at if app_ids[name] in (window.get_wm_class() or [])]:
+        latency = time.monotonic() - _spawned_at.pop(name)
+        spawn_latencies.setdefault(name, []).append(latency)
+        logger.info("%s dropdown appeared %.0f ms after being spawned", name, latency * 1000)
@@ -0,0 +1,86 @@
+"""
+Scrolling text
+==============
+
+A scrolling text widget normally renders its whole text layout again for every scroll
+step. ``StripScroll`` renders the text once into an offscreen strip when it changes, and
+each scroll step just paints the visible part of that strip.
+
+Scrolling also stops while a media player widget (one with ``is_playing``) is paused,
+and, as usual, when the text fits in the widget.
+"""
+
+from __future__ import annotations
+
+import cairocffi
+from libqtile import pangocffi
+
+
+class StripScroll:
+    """Mixin for horizontal text widgets, which must come before the widget class."""
+
+    _strip: cairocffi.ImageSurface | None = None
+    _strip_key: tuple | None = None
+
+    def _render_strip(self) -> None:
+        width = max(self.layout.width, 1)
+        self._strip = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, self.bar.height)
+
+        # The layout draws to the drawer's context, so point that at the strip for now.
+        # It shows itself through the pango functions that Qtile adds to its contexts.
+        ctx = self.drawer.ctx
+        self.drawer.ctx = pangocffi.patch_cairo_context(cairocffi.Context(self._strip))
+        try:
+            self.layout.draw(0, int(self.bar.height / 2.0 - self.layout.height / 2.0) + 1)
+        finally:
+            self.drawer.ctx = ctx
+
+    def draw(self):
+        if not self.can_draw():
+            return
+        if not self._should_scroll or not self.bar.horizontal:
+            super().draw()
+            return
+
+        key = (
+            self.layout.text,
+            self.layout.colour,
+            self.font,
+            self.fontsize,
+            self.bar.height,
+        )
+        if key != self._strip_key or self._strip is None:
+            self._render_strip()
+            self._strip_key = key
+
+        self.drawer.clear(self.background or self.bar.background)
+        ctx = self.drawer.ctx
+        ctx.save()
+        ctx.rectangle(
+            self.actual_padding,
+            0,
+            self._scroll_width - 2 * self.actual_padding,
+            self.bar.size,
+        )
+        ctx.clip()
+        ctx.set_source_surface(self._strip, self.actual_padding - self._scroll_offset, 0)
+        ctx.paint()
+        ctx.restore()
+
+        self.draw_at_default_position()
+
+        if (
+            self._is_scrolling
+            and not self._scroll_queued
+            and getattr(self, "is_playing", True)
+        ):
+            self._scroll_queued = True
+            if self._scroll_offset == 0:
+                interval = self.scroll_delay
+            else:
+                interval = self.scroll_interval
+            self._scroll_timer = self.timeout_add(interval, self.do_scroll)
+
+    def finalize(self):
+        self._strip = None
+        super().finalize()
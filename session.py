@@ -0,0 +1,485 @@
+"""
+Session services
+================
+
+The programs that make up the rest of the session, started when Qtile first starts:
+
+    Service("firefox", ["firefox"], after=["keepassxc"], ready=WindowAppears("firefox"))
+
+Every service is started as soon as the services named in its ``after`` are ready, so
+independent services start together. A service is ready when its ``ready`` check
+passes: a socket accepting connections, a name appearing on the session bus, a window
+being managed or a command succeeding. Without a check, a ``oneshot`` service is ready
+once it has exited successfully, and any other service as soon as it has started. A
+check that doesn't pass within its timeout is logged, and the service's dependents are
+started anyway.
+
+A service with ``if_new`` isn't started if it is already running, which is found by
+reading ``/proc`` once, or by its own ``running`` check if its program is also run for
+other things (e.g. the terminal server). A service with ``restart`` is started again
+when it exits, waiting twice as long each time it exits soon after starting. When Qtile
+shuts down, the processes that are still running are terminated.
+
+How long each service took to be ready and when the whole session was ready are logged,
+and kept in ``timings``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from libqtile import qtile
+from libqtile.log_utils import logger
+
+import hooks
+import terminal
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+HOME = os.path.expanduser("~")
+IS_XEPHYR = int(os.environ.get("QTILE_XEPHYR", 0))
+
+# Where the services' output goes
+LOG_FILE = os.path.join(HOME, ".local/share/qtile/qtile.log")
+
+
+class Check(ABC):
+    timeout = 10.0
+
+    @abstractmethod
+    async def wait(self) -> None:
+        """Return once the service is ready."""
+
+
+class SocketAccepts(Check):
+    """A Unix socket accepts connections."""
+
+    interval = 0.02
+
+    def __init__(self, path: Callable[[], str]):
+        self.path = path
+
+    def _connects(self) -> bool:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path())
+            except OSError:
+                return False
+        return True
+
+    async def wait(self):
+        while not self._connects():
+            await asyncio.sleep(self.interval)
+
+
+class CommandSucceeds(Check):
+    """A command exits successfully."""
+
+    interval = 0.1
+
+    def __init__(self, *argv: str):
+        self.argv = argv
+
+    async def wait(self):
+        while True:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *self.argv,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                if await proc.wait() == 0:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(self.interval)
+
+
+class BusName(Check):
+    """A name is owned on the session bus."""
+
+    def __init__(self, name: str, timeout: float | None = None):
+        self.name = name
+        if timeout is not None:
+            self.timeout = timeout
+
+    async def wait(self):
+        try:
+            from dbus_fast import Message
+            from dbus_fast.aio import MessageBus
+        except ImportError:
+            from dbus_next import Message
+            from dbus_next.aio import MessageBus
+
+        def dbus_call(member, body):
+            return Message(
+                destination="org.freedesktop.DBus",
+                path="/org/freedesktop/DBus",
+                interface="org.freedesktop.DBus",
+                member=member,
+                signature="s",
+                body=body,
+            )
+
+        owned = asyncio.get_running_loop().create_future()
+
+        def on_message(message):
+            if (
+                message.member == "NameOwnerChanged"
+                and message.body[0] == self.name
+                and message.body[2]
+                and not owned.done()
+            ):
+                owned.set_result(None)
+
+        rule = (
+            "type='signal',sender='org.freedesktop.DBus',interface='org.freedesktop.DBus',"
+            f"member='NameOwnerChanged',arg0='{self.name}'"
+        )
+        bus = await MessageBus().connect()
+        try:
+            bus.add_message_handler(on_message)
+            await bus.call(dbus_call("AddMatch", [rule]))
+            # Ask after subscribing so that the name can't be missed in between
+            reply = await bus.call(dbus_call("NameHasOwner", [self.name]))
+            if not reply.body[0]:
+                await owned
+        finally:
+            bus.disconnect()
+
+
+class WindowAppears(Check):
+    """A window with a WM class is managed."""
+
+    timeout = 30.0
+
+    def __init__(self, wm_class: str):
+        self.wm_class = wm_class
+
+    async def wait(self):
+        for win in qtile.windows_map.values():
+            if self.wm_class in (win.get_wm_class() or []):
+                return
+        managed = asyncio.get_running_loop().create_future()
+        _window_waiters.setdefault(self.wm_class, []).append(managed)
+        await managed
+
+
+# WM class -> futures waiting for a window with that class. Kept if this module is
+# reloaded, along with the supervisor whose checks are waiting.
+_window_waiters: dict[str, list[asyncio.Future]] = globals().get("_window_waiters", {})
+
+
+@hooks.subscribe.client_managed
+def _resolve_window_waiters(win):
+    for wm_class in win.get_wm_class() or []:
+        for waiter in _window_waiters.pop(wm_class, []):
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class Service:
+    def __init__(
+        self,
+        name: str,
+        argv: list[str],
+        after: list[str] | None = None,
+        ready: Check | None = None,
+        oneshot: bool = False,
+        restart: bool = False,
+        if_new: bool = False,
+        running: Callable[[], bool] | None = None,
+        xephyr: bool = False,
+    ):
+        self.name = name
+        self.argv = argv
+        self.after = after or []
+        self.ready = ready
+        self.oneshot = oneshot
+        self.restart = restart
+        self.if_new = if_new
+        # For if_new, whether it is running, if not found by its program's name
+        self.running = running
+        # Whether to start it when running nested in Xephyr
+        self.xephyr = xephyr
+
+
+# Restarts wait this long at first and then twice as long each time, up to the maximum.
+# A service that runs for longer than restart_reset goes back to the shortest wait.
+restart_delay = 1.0
+restart_delay_max = 60.0
+restart_reset = 30.0
+
+
+def running_programs() -> set[str]:
+    """The names of the programs that this user is running, from /proc."""
+    uid = os.getuid()
+    names = set()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            if os.stat(f"/proc/{pid}").st_uid != uid:
+                continue
+            with open(f"/proc/{pid}/comm") as f:
+                names.add(f.read().strip())
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0]
+        except OSError:
+            # It has exited
+            continue
+        if argv0:
+            # comm is cut short at 15 characters
+            names.add(os.path.basename(argv0.decode(errors="replace")))
+    return names
+
+
+class Supervisor:
+    def __init__(self, services: list[Service]):
+        self.services = {service.name: service for service in services}
+        self.processes: dict[str, asyncio.subprocess.Process] = {}
+        # Name -> seconds from the supervisor starting to the service being ready
+        self.timings: dict[str, float] = {}
+        self.session_ready: float | None = None
+        self._ready: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._start = 0.0
+        self._log = None
+
+        for service in services:
+            for dependency in service.after:
+                if dependency not in self.services:
+                    raise ValueError(f"{service.name} is after unknown service {dependency}")
+
+    def start(self) -> None:
+        self._start = time.monotonic()
+        self._log = open(LOG_FILE, "ab")
+        running = running_programs()
+        self._ready = {name: asyncio.Event() for name in self.services}
+        self._tasks = [
+            asyncio.create_task(self._run(service, service.if_new and self._running(service, running)))
+            for service in self.services.values()
+        ]
+        self._tasks.append(asyncio.create_task(self._wait_session_ready()))
+
+    @staticmethod
+    def _running(service: Service, programs: set[str]) -> bool:
+        if service.running is not None:
+            return service.running()
+        return os.path.basename(service.argv[0]) in programs
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for proc in self.processes.values():
+            if proc.returncode is None:
+                proc.terminate()
+        self.processes.clear()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    async def _run(self, service: Service, skip: bool) -> None:
+        for dependency in service.after:
+            await self._ready[dependency].wait()
+
+        if skip:
+            logger.info("%s is already running", service.name)
+            self._set_ready(service)
+            return
+
+        started = await self._spawn(service)
+        if started and service.ready is not None:
+            try:
+                await asyncio.wait_for(service.ready.wait(), service.ready.timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "%s wasn't ready after %.0f s, starting its dependents anyway",
+                    service.name,
+                    service.ready.timeout,
+                )
+            except Exception:
+                logger.exception("Could not check whether %s is ready", service.name)
+        elif started and service.oneshot:
+            code = await self.processes[service.name].wait()
+            if code:
+                logger.warning("%s exited with code %d", service.name, code)
+        self._set_ready(service)
+
+        if started and service.restart:
+            await self._supervise(service)
+
+    async def _spawn(self, service: Service) -> bool:
+        try:
+            self.processes[service.name] = await asyncio.create_subprocess_exec(
+                *service.argv,
+                stdin=subprocess.DEVNULL,
+                stdout=self._log,
+                stderr=self._log,
+            )
+        except OSError:
+            logger.exception("Could not start %s", service.name)
+            return False
+        return True
+
+    def _set_ready(self, service: Service) -> None:
+        self.timings[service.name] = self._elapsed()
+        self._ready[service.name].set()
+
+    async def _supervise(self, service: Service) -> None:
+        delay = restart_delay
+        while True:
+            started = time.monotonic()
+            code = await self.processes[service.name].wait()
+            if time.monotonic() - started > restart_reset:
+                delay = restart_delay
+            logger.warning(
+                "%s exited with code %d, restarting in %.1f s", service.name, code, delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, restart_delay_max)
+            while not await self._spawn(service):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, restart_delay_max)
+
+    async def _wait_session_ready(self) -> None:
+        await asyncio.gather(*(event.wait() for event in self._ready.values()))
+        self.session_ready = self._elapsed()
+        lines = [f"Session ready in {self.session_ready * 1000:.0f} ms"]
+        for name, elapsed in sorted(self.timings.items(), key=lambda item: item[1]):
+            lines.append(f"    {elapsed * 1000:8.0f} ms  {name}")
+        logger.info("\n".join(lines))
+
+
+WALLPAPER = os.path.join(HOME, "pictures/Wallpapers/Leuh6wm-slow.gif")
+# The environment variables that the systemd user session and D-Bus activated services
+# need from Qtile
+ENVIRONMENT = ["WAYLAND_DISPLAY", "XDG_CURRENT_DESKTOP"]
+
+services = [
+    Service(
+        "foot",
+        terminal.FOOT.server,
+        ready=SocketAccepts(terminal.FOOT.socket_path),
+        restart=True,
+        # foot is also the name of every standalone terminal
+        if_new=True,
+        running=terminal.FOOT.server_running,
+        xephyr=True,
+    ),
+    Service("swww", ["swww", "init"], ready=CommandSucceeds("swww", "query"), xephyr=True),
+    Service(
+        "wallpaper",
+        [
+            *"swww img --filter Nearest --transition-step=1 --transition-fps 60".split(),
+            *["--transition-duration", "12", WALLPAPER],
+        ],
+        after=["swww"],
+        oneshot=True,
+        xephyr=True,
+    ),
+    # Session setup
+    Service(
+        "systemd-environment",
+        ["systemctl", "--user", "import-environment", *ENVIRONMENT],
+        oneshot=True,
+    ),
+    Service(
+        "dbus-environment",
+        ["dbus-update-activation-environment", *ENVIRONMENT],
+        oneshot=True,
+    ),
+    # Services
+    Service("kanshi", ["kanshi"], restart=True, if_new=True),
+    Service("wlsunset", ["wlsunset"], restart=True, if_new=True),
+    Service("swayidle", ["swayidle"], restart=True, if_new=True),
+    Service(
+        "swaync",
+        ["swaync"],
+        after=["dbus-environment"],
+        ready=BusName("org.freedesktop.Notifications"),
+        restart=True,
+        if_new=True,
+    ),
+    Service(
+        "playerctld",
+        ["playerctld", "daemon"],
+        ready=BusName("org.mpris.MediaPlayer2.playerctld"),
+        restart=True,
+        if_new=True,
+    ),
+    Service("mpDris2", ["mpDris2"], after=["playerctld"], restart=True, if_new=True),
+    Service(
+        "sway-mpris-idle-inhibit",
+        ["sway-mpris-idle-inhibit"],
+        after=["playerctld"],
+        restart=True,
+        if_new=True,
+    ),
+    Service("nm-applet", ["nm-applet", "--indicator"], restart=True, if_new=True),
+    # Service("kdeconnect-indicator", ["kdeconnect-indicator"], restart=True, if_new=True),
+    Service(
+        "darkman",
+        ["darkman", "run"],
+        ready=BusName("nl.whynothugo.darkman"),
+        restart=True,
+        if_new=True,
+    ),
+    # Startup programs. The browser connects to the password manager once both are open.
+    # KeePassXC may start minimised to the tray without a window.
+    Service(
+        "keepassxc",
+        ["keepassxc"],
+        ready=BusName("org.keepassxc.KeePassXC.MainWindow", timeout=5.0),
+        if_new=True,
+    ),
+    Service(
+        "firefox",
+        ["firefox"],
+        after=["keepassxc"],
+        ready=WindowAppears("firefox"),
+        if_new=True,
+    ),
+    Service("evolution", ["evolution"], ready=WindowAppears("org.gnome.Evolution"), if_new=True),
+    # Notify me if any systemd services failed
+    Service("check_systemd", ["check_systemd"], after=["systemd-environment"], oneshot=True),
+]
+
+# The running supervisor is kept if this module is reloaded
+_supervisor: Supervisor | None = globals().get("_supervisor")
+
+
+def start() -> Supervisor:
+    """Start the session's services."""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = Supervisor([s for s in services if s.xephyr or not IS_XEPHYR])
+        _supervisor.start()
+    return _supervisor
+
+
+def timings() -> dict[str, float]:
+    """How long each service took to be ready, and the whole session, in seconds."""
+    if _supervisor is None:
+        return {}
+    result = dict(_supervisor.timings)
+    if _supervisor.session_ready is not None:
+        result["session"] = _supervisor.session_ready
+    return result
+
+
+@hooks.subscribe.shutdown
+def _stop_services():
+    if _supervisor is not None:
+        _supervisor.stop()
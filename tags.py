@@ -14,58 +14,114 @@ import os
 from collections import defaultdict
 from typing import TYPE_CHECKING
 
-from libqtile import hook, qtile
+from libqtile import qtile
 from libqtile.backend.base import Window
 from libqtile.config import Group, Match
 from libqtile.lazy import lazy
-from libqtile.log_utils import logger
+
+import hooks
 
 if TYPE_CHECKING:
-    from typing import List, Tuple
+    from typing import Any, Dict, List, Tuple
 
 
 groups: List[Group] = [Group("")]
 
-tags: List[Tuple[str, Match, List[Window]]] = [
-    ("terms", Match(wm_class="foot"), []),
-    ("firefox", Match(wm_class="firefox"), []),
-    ("thunar", Match(wm_class="thunar"), []),
-]
-
 
-@hook.subscribe.client_new
-def _(window):
+class Tag:
+    """A named set of windows, matched as they are created, that are shown and hidden together."""
+
+    def __init__(self, name: str, match: Match):
+        self.name = name
+        self.match = match
+        # Window ID -> window, in the order they were added
+        self.windows: Dict[int, Window] = {}
+
+    @property
+    def hidden(self) -> bool:
+        """Whether the tag's windows are hidden, going by its first window."""
+        first = next(iter(self.windows.values()), None)
+        return first is not None and first.minimized
+
+
+tags: Dict[str, Tag] = {
+    tag.name: tag
+    for tag in [
+        Tag("terms", Match(wm_class="foot")),
+        Tag("firefox", Match(wm_class="firefox")),
+        Tag("thunar", Match(wm_class="thunar")),
+    ]
+}
+
+# Tags that only match a single WM class are found by that class, the rest are compared
+_by_class: Dict[str, List[Tag]] = defaultdict(list)
+_other_tags: List[Tag] = []
+for tag in tags.values():
+    wm_class = tag.match._rules.get("wm_class")
+    if len(tag.match._rules) == 1 and isinstance(wm_class, str):
+        _by_class[wm_class].append(tag)
+    else:
+        _other_tags.append(tag)
+
+# Window ID -> the tags it belongs to
+_tags_of: Dict[int, List[Tag]] = {}
+
+
+def _matching_tags(window: Window) -> List[Tag]:
+    matching = []
+    for wm_class in window.get_wm_class() or []:
+        for tag in _by_class.get(wm_class, []):
+            if tag not in matching:
+                matching.append(tag)
+    matching.extend(tag for tag in _other_tags if tag.match.compare(window))
+    return matching
+
+
+@hooks.subscribe.client_new
+def _add_to_tags(window):
     """
     This adds windows to any tags that match it.
     """
     if isinstance(window, Window):  # Static windows ignored
-        for name, match, windows in tags:
-            if match.compare(window):
-                windows.append(window)
-                tag_hidden = windows[0].minimized
-                window.minimized = tag_hidden
-                qtile.current_screen.group.add(
-                    window, focus=window.can_steal_focus and tag_hidden
-                )
+        for tag in _matching_tags(window):
+            tag_hidden = tag.hidden
+            tag.windows[window.wid] = window
+            _tags_of.setdefault(window.wid, []).append(tag)
+            window.minimized = tag_hidden
+            qtile.current_screen.group.add(
+                window, focus=window.can_steal_focus and tag_hidden
+            )
+
+
+@hooks.subscribe.client_killed
+def _remove_from_tags(window):
+    for tag in _tags_of.pop(window.wid, []):
+        tag.windows.pop(window.wid, None)
 
 
 def _toggle_tag(_qtile, to_toggle: str):
     """
     This is bound to keys to show/hide all windows of a given tag. It toggles their
-    minimized state.
+    minimized state, and then lays out each of their groups once.
     """
-    for name, match, windows in tags:
-        if name == to_toggle:
-            for window in windows:
-                window.toggle_minimize()
-            return
+    tag = tags.get(to_toggle)
+    if tag is None:
+        return
+
+    groups = set()
+    for window in tag.windows.values():
+        window.minimized = not window.minimized
+        if window.group:
+            groups.add(window.group)
+    for group in groups:
+        group.layout_all()
 
 
 mod = "mod1" if int(os.environ.get("QTILE_XEPHYR", 0)) else "mod4"
 
 keys_group: Tuple[List[str], str, Any, str] = []
 
-for i, (name, _, _) in enumerate(tags):
+for i, name in enumerate(tags):
     keys_group.extend(
         [
             ([mod], str(i + 1), lazy.function(_toggle_tag, name), f"Toggle tag {name}"),
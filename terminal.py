@@ -0,0 +1,111 @@
+"""
+Terminals
+=========
+
+Starting a new terminal process means loading its fonts and connecting to the display
+all over again. Terminals like foot and urxvt can instead run a server that opens each
+new window for a lightweight client.
+
+``Terminal.command`` builds a command that opens a window through the terminal's server
+with a given app ID (or X11 WM_CLASS instance), and falls back to starting a standalone
+terminal if the server can't be reached. ``Terminal.ensure_server`` starts the server if
+it isn't already running.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+from typing import TYPE_CHECKING
+
+from libqtile.log_utils import logger
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+
+class Terminal:
+    def __init__(
+        self,
+        standalone: str,
+        client: str | None = None,
+        server: list[str] | None = None,
+        socket_path: Callable[[], str] | None = None,
+    ):
+        # Commands are formatted with the app ID as {id} and the command as {cmd}
+        self.standalone = standalone
+        self.client = client
+        self.server = server
+        self.socket_path = socket_path
+
+    @property
+    def has_server(self) -> bool:
+        return self.client is not None and self.server is not None
+
+    def server_running(self) -> bool:
+        """Whether the server's socket accepts connections."""
+        if self.socket_path is None:
+            return False
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path())
+            except OSError:
+                return False
+        return True
+
+    def ensure_server(self) -> None:
+        """Start the terminal server if it has one and it isn't running."""
+        if not self.has_server or self.server_running():
+            return
+        if shutil.which(self.server[0]) is None:
+            return
+        logger.info("Starting terminal server: %s", " ".join(self.server))
+        subprocess.Popen(
+            self.server,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def command(self, app_id: str, cmd: str) -> str:
+        """A command that opens a terminal window running cmd."""
+        standalone = self.standalone.format(id=app_id, cmd=cmd)
+        if not self.has_server:
+            return standalone
+        client = self.client.format(id=app_id, cmd=cmd)
+        return "sh -c " + shlex.quote(f"{client} || exec {standalone}")
+
+
+def _foot_socket() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+    display = os.environ.get("WAYLAND_DISPLAY", "wayland-0")
+    return os.path.join(runtime_dir, f"foot-{display}.sock")
+
+
+def _urxvt_socket() -> str:
+    return os.environ.get("RXVT_SOCKET") or os.path.expanduser(
+        f"~/.urxvt/urxvtd-{socket.gethostname()}"
+    )
+
+
+# footclient and urxvtc return as soon as the server has opened the window, or fail
+# straight away if they can't connect
+FOOT = Terminal(
+    standalone="foot --app-id={id} {cmd}",
+    client="footclient --no-wait --app-id={id} {cmd}",
+    server=["foot", "--server"],
+    socket_path=_foot_socket,
+)
+
+URXVT = Terminal(
+    standalone="urxvt -name {id} -e {cmd}",
+    client="urxvtc -name {id} -e {cmd}",
+    server=["urxvtd", "-q", "-o", "-f"],
+    socket_path=_urxvt_socket,
+)
+
+XTERM = Terminal(standalone="xterm -name {id} -e {cmd}")
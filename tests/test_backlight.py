@@ -0,0 +1,109 @@
+"""
+Tests for ``backlight`` against a fake sysfs tree.
+"""
+
+import asyncio
+
+import pytest
+
+import backlight
+
+
+def make_device(root, name, brightness=50, max_brightness=100):
+    device = root / name
+    device.mkdir(parents=True)
+    (device / "max_brightness").write_text(f"{max_brightness}\n")
+    (device / "actual_brightness").write_text(f"{brightness}\n")
+    (device / "brightness").write_text(f"{brightness}\n")
+    return device
+
+
+def test_find_device(tmp_path):
+    assert backlight.find_device(str(tmp_path / "missing")) is None
+    assert backlight.find_device(str(tmp_path)) is None
+    make_device(tmp_path, "acpi_video0")
+    make_device(tmp_path, "intel_backlight")
+    assert backlight.find_device(str(tmp_path)) == "intel_backlight"
+
+
+def test_read_and_set(tmp_path):
+    device = make_device(tmp_path, "intel_backlight", brightness=300, max_brightness=1200)
+
+    async def run():
+        dev = backlight.BacklightDevice(lambda: None, root=str(tmp_path))
+        dev.open()
+        try:
+            assert dev.name == "intel_backlight"
+            assert dev.get_fraction() == 0.25
+            dev.set_percent(50)
+            assert (device / "brightness").read_text().strip() == "600"
+        finally:
+            dev.finalize()
+
+    asyncio.run(run())
+
+
+def test_named_device(tmp_path):
+    make_device(tmp_path, "acpi_video0", brightness=10, max_brightness=20)
+    make_device(tmp_path, "intel_backlight")
+
+    async def run():
+        dev = backlight.BacklightDevice(lambda: None, name="acpi_video0", root=str(tmp_path))
+        dev.open()
+        try:
+            assert dev.get_fraction() == 0.5
+        finally:
+            dev.finalize()
+
+    asyncio.run(run())
+
+
+def test_no_device(tmp_path):
+    async def run():
+        dev = backlight.BacklightDevice(lambda: None, root=str(tmp_path))
+        dev.open()
+        with pytest.raises(RuntimeError):
+            dev.get_fraction()
+        # Nothing to write to
+        dev.set_percent(50)
+        dev.finalize()
+
+    asyncio.run(run())
+
+
+def test_change_is_noticed(tmp_path):
+    device = make_device(tmp_path, "intel_backlight")
+
+    async def run():
+        changed = asyncio.Event()
+        dev = backlight.BacklightDevice(changed.set, root=str(tmp_path))
+        dev.open()
+        try:
+            # e.g. the hardware changing it, or another tool
+            with open(device / "actual_brightness", "w") as f:
+                f.write("75\n")
+            await asyncio.wait_for(changed.wait(), 1)
+            assert dev.get_fraction() == 0.75
+        finally:
+            dev.finalize()
+
+    asyncio.run(run())
+
+
+def test_reopen(tmp_path):
+    make_device(tmp_path, "acpi_video0", brightness=10, max_brightness=20)
+
+    async def run():
+        dev = backlight.BacklightDevice(lambda: None, root=str(tmp_path))
+        dev.open()
+        try:
+            assert dev.name == "acpi_video0"
+            # A new device is added, as would be announced by a uevent
+            make_device(tmp_path, "intel_backlight", brightness=25)
+            dev.open()
+            assert dev.name == "intel_backlight"
+            assert dev.get_fraction() == 0.25
+        finally:
+            dev.finalize()
+
+    asyncio.run(run())
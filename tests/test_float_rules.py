@@ -0,0 +1,49 @@
+"""
+Tests for ``float_rules``, against window properties captured in ``windows.json``.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+try:
+    import float_rules
+except OSError:
+    # libqtile.backend loads cairo
+    pytest.skip("cairo isn't available", allow_module_level=True)
+
+
+@pytest.fixture
+def captured():
+    with open(Path(__file__).parent / "windows.json") as f:
+        return json.load(f)
+
+
+def floats(title, wm_class, role=None, wm_type="normal"):
+    compiled = float_rules.CompiledFloatRules(float_rules.float_rules)
+    return compiled.compare(float_rules._Properties(wm_class, title, role, wm_type))
+
+
+def test_same_decisions_as_match_compare(captured):
+    compiled = float_rules.CompiledFloatRules(float_rules.float_rules)
+    for props in captured:
+        win = float_rules._Properties(*props)
+        expected = any(rule.compare(win) for rule in float_rules.float_rules)
+        assert compiled.compare(win) == expected, float_rules._get_properties(win)
+        # And again from the memoized decision
+        assert compiled.compare(win) == expected, float_rules._get_properties(win)
+
+
+def test_decisions():
+    assert floats("Volume Control", ["pavucontrol", "Pavucontrol"])
+    assert floats("Compose Message", ["evolution", "Evolution"], wm_type="dialog")
+    assert floats("Export Image", ["gimp", "Gimp"], role="gimp-file-export")
+    # A regex on the class together with an exact title
+    assert floats("File Operation Progress", ["Thunar"])
+    assert not floats("File Operation Progress", ["nautilus"])
+    assert floats("Presenting: talk.odp", ["soffice", "libreoffice-impress"])
+    assert not floats("Presenting: notes.odt", ["soffice", "libreoffice-writer"])
+    assert not floats("Mozilla Firefox", ["Navigator", "firefox"])
+    assert not floats("video.mkv - mpv", ["mpv", "mpv"])
+    assert not floats(None, None, wm_type=None)
@@ -0,0 +1,60 @@
+"""
+Tests for ``partition`` and going to groups with ``groups``.
+"""
+
+import groups
+from partition import Partition
+
+
+class FakeGroup:
+    def __init__(self, qtile, name):
+        self.qtile = qtile
+        self.name = name
+
+    def toscreen(self, toggle=False):
+        self.qtile.current_screen.group = self
+
+
+class FakeScreen:
+    def __init__(self, index):
+        self.index = index
+        self.group = None
+
+
+class FakeQtile:
+    def __init__(self, screens, names):
+        self.screens = [FakeScreen(i) for i in range(screens)]
+        self.current_screen = self.screens[0]
+        self.groups_map = {name: FakeGroup(self, name) for name in names}
+        for screen, name in zip(self.screens, names):
+            screen.group = self.groups_map[name]
+
+    def focus_screen(self, index):
+        self.current_screen = self.screens[index]
+
+
+def test_more_screens_than_groups():
+    partition = Partition(["a", "b", "c"])
+    partition.update(5)
+    assert [partition.groups_on(screen) for screen in range(5)] == [["a"], ["b"], ["c"], [], []]
+    assert partition.screen_of("c") == 2
+    assert partition.screen_of("d") is None
+    assert partition.step("b", 1) == "b"
+
+
+def test_go_to_group():
+    names = [group.name for group in groups.groups]
+    qtile = FakeQtile(2, names)
+    groups._go_to_group(qtile, "w")
+    assert qtile.current_screen.index == 1
+    assert qtile.current_screen.group.name == "w"
+
+
+def test_go_to_unpartitioned_group():
+    names = [group.name for group in groups.groups]
+    qtile = FakeQtile(2, names + ["scratch"])
+    qtile.focus_screen(1)
+    # Not one of the partitioned groups, so it goes to the current screen
+    groups._go_to_group(qtile, "scratch")
+    assert qtile.current_screen.index == 1
+    assert qtile.current_screen.group.name == "scratch"
@@ -0,0 +1,37 @@
+"""
+Tests for ``hooks``.
+"""
+
+from libqtile import hook
+from libqtile.command.base import CommandObject
+from libqtile.command.graph import CommandGraphRoot
+from libqtile.command.interface import QtileCommandInterface
+
+import hooks
+
+
+class FakeQtile(CommandObject):
+    def _select(self, name, sel):
+        return None
+
+    def _items(self, name):
+        return None
+
+
+def test_hook_subscriptions_command(monkeypatch):
+    qtile = FakeQtile()
+    monkeypatch.setattr(hooks, "qtile", qtile)
+    hooks._expose_command("hook_subscriptions", hooks.subscriptions)
+
+    def on_startup():
+        pass
+
+    hooks.subscribe.startup(on_startup)
+    try:
+        # As called through IPC, e.g. by qtile cmd-obj -o cmd -f hook_subscriptions
+        call = CommandGraphRoot().call("hook_subscriptions")
+        result = QtileCommandInterface(qtile).execute(call, (), {})
+    finally:
+        hook.unsubscribe.startup(on_startup)
+
+    assert f"{__name__}.test_hook_subscriptions_command.<locals>.on_startup" in result["startup"]
@@ -0,0 +1,87 @@
+"""
+Tests for ``keymap``, reloading it as Qtile does when the config is reloaded.
+"""
+
+import importlib
+
+import libqtile
+import pytest
+from libqtile.lazy import lazy
+
+import persist
+
+
+class FakeCore:
+    def __init__(self):
+        self.grabbed = []
+        self.ungrabbed = []
+
+    def grab_key(self, key):
+        self.grabbed.append(key.key)
+        return (key.key, tuple(sorted(key.modifiers)))
+
+    def ungrab_key(self, key):
+        self.ungrabbed.append(key.key)
+
+
+class FakeQtile:
+    def __init__(self):
+        self.core = FakeCore()
+        self.keys_map = {}
+        self.pending = []
+
+    def call_soon(self, func, *args):
+        self.pending.append((func, args))
+
+    def run_pending(self):
+        while self.pending:
+            func, args = self.pending.pop(0)
+            func(*args)
+
+
+@pytest.fixture
+def qtile(monkeypatch):
+    qtile = FakeQtile()
+    monkeypatch.setattr(libqtile, "qtile", qtile)
+    monkeypatch.setattr(persist, "qtile", qtile)
+    return qtile
+
+
+def load(qtile, table):
+    # What Qtile does with the config's keys each time it loads the config
+    import keymap
+
+    keymap = importlib.reload(keymap)
+    return keymap.build(table)
+
+
+def test_reload_only_changes_grabs(qtile):
+    table = [
+        (["mod4"], "a", lazy.spawn("a"), "A"),
+        (["mod4"], "b", lazy.spawn("b"), "B"),
+        (["mod4"], "c", lazy.spawn("c"), "C"),
+    ]
+    keys = load(qtile, table)
+    for key in keys:
+        qtile.grab_key(key)
+    assert qtile.core.grabbed == ["a", "b", "c"]
+    qtile.core.grabbed.clear()
+
+    # b is changed and c is dropped
+    new_table = [
+        (["mod4"], "a", lazy.spawn("a"), "A"),
+        (["mod4"], "b", lazy.spawn("bb"), "B"),
+    ]
+    # Qtile loads the config, ungrabs the keys, loads the config again, then grabs them
+    load(qtile, new_table)
+    qtile.ungrab_keys()
+    new_keys = load(qtile, new_table)
+    for key in new_keys:
+        qtile.grab_key(key)
+    qtile.run_pending()
+
+    assert new_keys[0] is keys[0]
+    assert new_keys[1] is not keys[1]
+    assert qtile.core.grabbed == ["b"]
+    assert qtile.core.ungrabbed == ["c"]
+    assert set(qtile.keys_map.values()) == set(new_keys)
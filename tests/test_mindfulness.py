@@ -0,0 +1,167 @@
+"""
+Tests for ``mindfulness``.
+"""
+
+import asyncio
+import math
+import os
+import struct
+import wave
+
+import pytest
+
+import mindfulness
+
+
+def test_fetch_audio(tmp_path):
+    source = tmp_path / "tone.mp3"
+    source.write_bytes(b"\x00\x01" * 100000)
+    path = tmp_path / "cache" / "tone.mp3"
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        # The event loop keeps running while the file is copied
+        ticker = asyncio.create_task(tick())
+        await mindfulness.fetch_audio(source.as_uri(), str(path))
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 0
+    assert path.read_bytes() == source.read_bytes()
+    assert not (tmp_path / "cache" / "tone.mp3.part").exists()
+
+
+def test_fetch_audio_missing(tmp_path):
+    path = tmp_path / "cache" / "tone.mp3"
+    with pytest.raises(OSError):
+        asyncio.run(mindfulness.fetch_audio((tmp_path / "missing.mp3").as_uri(), str(path)))
+    # A failed fetch doesn't leave a file that would be used next time
+    assert not path.exists()
+
+
+class FakeQtile:
+    def call_later(self, delay, func, *args):
+        return asyncio.get_running_loop().call_later(delay, func, *args)
+
+
+class FakePlayer:
+    def __init__(self, path):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_configure_after_finalize(tmp_path, monkeypatch):
+    def configure(widget, qtile, bar):
+        widget.qtile = qtile
+        widget.finalized = False
+
+    def finalize(widget):
+        for future in widget._futures:
+            future.cancel()
+        widget.finalized = True
+
+    # Without a bar to draw in
+    monkeypatch.setattr(mindfulness.base._TextBox, "_configure", configure)
+    monkeypatch.setattr(mindfulness.base._TextBox, "finalize", finalize)
+    monkeypatch.setattr(mindfulness, "TonePlayer", FakePlayer)
+    audio = tmp_path / "tone.mp3"
+    audio.write_bytes(b"")
+
+    async def run():
+        qtile = FakeQtile()
+        widget = mindfulness.ReMindfulness(audio_file=str(audio))
+        widget._configure(qtile, None)
+        await widget._fetch
+        player = widget._player
+
+        # e.g. the screen is removed and added again
+        widget.finalize()
+        assert player.closed
+        widget._configure(qtile, None)
+        await widget._fetch
+
+        assert widget._player is not None and widget._player is not player
+        assert widget.next_reminder is not None
+        assert any(not future.cancelled() for future in widget._futures)
+        widget.finalize()
+
+    asyncio.run(run())
+
+
+def gst():
+    gi = pytest.importorskip("gi")
+    try:
+        gi.require_version("Gst", "1.0")
+        from gi.repository import Gst
+    except (ImportError, ValueError):
+        pytest.skip("GStreamer isn't available")
+    Gst.init(None)
+    for element in ("playbin", "wavparse"):
+        if Gst.ElementFactory.find(element) is None:
+            pytest.skip(f"GStreamer has no {element} element")
+    return Gst
+
+
+def write_tone(path, duration=0.02, rate=8000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        samples = (int(8000 * math.sin(i * 440 * 2 * math.pi / rate)) for i in range(int(duration * rate)))
+        f.writeframes(b"".join(struct.pack("<h", sample) for sample in samples))
+
+
+def rss():
+    """This process's resident memory in bytes."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def played(player, plays):
+    while player.plays == plays:
+        await asyncio.sleep(0.001)
+
+
+def test_tone_player_soak(tmp_path):
+    # Playing the tone again and again must not grow memory or leak file descriptors
+    Gst = gst()
+    path = tmp_path / "tone.wav"
+    write_tone(path)
+
+    async def run():
+        player = mindfulness.TonePlayer(str(path))
+        # Played in real time without needing a sound card. The sink can only be
+        # changed while the pipeline is stopped.
+        sink = Gst.ElementFactory.make("fakesink")
+        sink.props.sync = True
+        player._playbin.set_state(Gst.State.NULL)
+        player._playbin.props.audio_sink = sink
+        player._playbin.set_state(Gst.State.PAUSED)
+        try:
+            for i in range(500):
+                plays = player.plays
+                player.play()
+                await asyncio.wait_for(played(player, plays), 5)
+                if i == 10:
+                    # Give allocations made by the first few plays time to settle
+                    before = rss(), fds()
+            return rss() - before[0], fds() - before[1]
+        finally:
+            player.close()
+
+    growth, leaked = asyncio.run(run())
+    assert growth < 64 * 1024
+    assert leaked == 0
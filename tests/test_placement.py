@@ -0,0 +1,10 @@
+"""
+Tests for ``placement``.
+"""
+
+import placement
+
+
+def test_same_placements_as_the_hook_it_replaced():
+    # The benchmark checks every window is placed as the old hook function placed it
+    placement.benchmark(2000)
@@ -0,0 +1,184 @@
+"""
+Tests for ``reloader``, run in a subprocess against a config directory under tmp_path,
+so that Qtile's reloading and the state this keeps on the Qtile object are fresh.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIO = """
+import os
+import sys
+import time
+
+import libqtile
+from libqtile.confreader import Config
+
+
+class FakeQtile:
+    pass
+
+
+class FakeConfig(Config):
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def update(self, **settings):
+        pass
+
+
+config_dir = sys.argv[1]
+qtile = FakeQtile()
+libqtile.init(qtile)
+qtile.config = FakeConfig(os.path.join(config_dir, "config.py"))
+
+
+def reload():
+    print("reload")
+    # Qtile loads the config twice per reload
+    qtile.config.load()
+    qtile.config.load()
+
+
+qtile.config.load()
+reload()
+time.sleep(0.01)
+with open(os.path.join(config_dir, "a.py"), "w") as f:
+    f.write("X = 2\\nprint('exec a')\\n")
+reload()
+# Touched without being changed
+os.utime(os.path.join(config_dir, "c.py"))
+reload()
+
+import a
+print("X", a.X)
+"""
+
+
+def test_only_changed_modules_are_reloaded(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "config.py").write_text(
+        textwrap.dedent(
+            """
+            import reloader
+            import a
+            import b
+            import c
+            reloader.record_loaded(reloader.CONFIG_DIR)
+            """
+        )
+    )
+    (config_dir / "a.py").write_text("X = 1\nprint('exec a')\n")
+    (config_dir / "b.py").write_text("import a\nprint('exec b')\n")
+    (config_dir / "c.py").write_text("print('exec c')\n")
+    # These live in the config directory alongside the modules they reload
+    for name in ("reloader.py", "hooks.py", "persist.py"):
+        shutil.copy(os.path.join(ROOT, name), config_dir)
+    (tmp_path / "scenario.py").write_text(SCENARIO)
+
+    env = dict(os.environ, PYTHONPATH=str(config_dir))
+    result = subprocess.run(
+        [sys.executable, str(tmp_path / "scenario.py"), str(config_dir)],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stdout.split()
+    assert lines == [
+        "exec", "a", "exec", "b", "exec", "c",
+        "reload",
+        "reload", "exec", "a", "exec", "b",
+        "reload",
+        "X", "2",
+    ]
+
+
+HOOKS_SCENARIO = """
+import os
+import sys
+import time
+
+import libqtile
+from libqtile import hook
+from libqtile.confreader import Config
+
+
+class FakeQtile:
+    pass
+
+
+class FakeConfig(Config):
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def update(self, **settings):
+        pass
+
+
+config_dir = sys.argv[1]
+qtile = FakeQtile()
+libqtile.init(qtile)
+qtile.config = FakeConfig(os.path.join(config_dir, "config.py"))
+
+
+def reload():
+    # As Qtile reloads the config
+    qtile.config.load()
+    hook.clear()
+    qtile.config.load()
+
+
+qtile.config.load()
+hook.fire("startup")
+print("reload")
+time.sleep(0.01)
+with open(os.path.join(config_dir, "config.py"), "w") as f:
+    f.write(sys.argv[2])
+reload()
+hook.fire("startup")
+"""
+
+
+def test_renamed_hooks_are_dropped(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    config = textwrap.dedent(
+        """
+        import reloader
+        import hooks
+        import a
+
+        @hooks.subscribe.startup
+        def {name}():
+            print("{name}")
+
+        reloader.record_loaded(reloader.CONFIG_DIR)
+        """
+    )
+    (config_dir / "config.py").write_text(config.format(name="old"))
+    (config_dir / "a.py").write_text(
+        "import hooks\n\n@hooks.subscribe.startup\ndef a():\n    print('a')\n"
+    )
+    for name in ("reloader.py", "hooks.py", "persist.py"):
+        shutil.copy(os.path.join(ROOT, name), config_dir)
+    (tmp_path / "scenario.py").write_text(HOOKS_SCENARIO)
+
+    env = dict(os.environ, PYTHONPATH=str(config_dir))
+    result = subprocess.run(
+        [sys.executable, str(tmp_path / "scenario.py"), str(config_dir), config.format(name="new")],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # a wasn't executed again, so it is subscribed again after Qtile clears the hooks
+    assert result.stdout.split() == ["a", "old", "reload", "a", "new"]
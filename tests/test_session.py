@@ -0,0 +1,93 @@
+"""
+Tests for ``session``'s supervisor, with ``sh -c`` standing in for the services.
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+import session
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "LOG_FILE", str(tmp_path / "qtile.log"))
+    return tmp_path / "services"
+
+
+def sh(script):
+    return ["sh", "-c", script]
+
+
+def run(supervisor, duration=None):
+    async def main():
+        supervisor.start()
+        try:
+            if duration is None:
+                await asyncio.wait_for(supervisor._tasks[-1], 5)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            supervisor.stop()
+
+    asyncio.run(main())
+
+
+def test_dependency_order(log):
+    supervisor = session.Supervisor(
+        [
+            session.Service("b", sh(f"echo b >> {log}"), after=["a"], oneshot=True),
+            session.Service("a", sh(f"sleep 0.2; echo a >> {log}"), oneshot=True),
+            session.Service("c", sh(f"echo c >> {log}"), oneshot=True),
+            session.Service("d", sh(f"echo d >> {log}"), after=["b", "c"], oneshot=True),
+            # Already running
+            session.Service("e", sh(f"echo e >> {log}"), if_new=True, running=lambda: True),
+        ]
+    )
+    run(supervisor)
+
+    # c doesn't wait for a
+    assert log.read_text().split() == ["c", "a", "b", "d"]
+    timings = supervisor.timings
+    assert timings["c"] < timings["a"] <= timings["b"] <= timings["d"]
+    assert supervisor.session_ready >= timings["d"]
+
+
+def test_unknown_dependency():
+    with pytest.raises(ValueError):
+        session.Supervisor([session.Service("a", sh("true"), after=["b"])])
+
+
+def test_restart_backoff(log, monkeypatch):
+    monkeypatch.setattr(session, "restart_delay", 0.1)
+    monkeypatch.setattr(session, "restart_delay_max", 0.4)
+    supervisor = session.Supervisor(
+        [session.Service("crash", sh(f"date +%s.%N >> {log}; exit 1"), restart=True)]
+    )
+    run(supervisor, 1.6)
+
+    starts = [float(line) for line in log.read_text().split()]
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # Waits of 0.1, 0.2, 0.4 and then 0.4 s, plus the time taken to start sh
+    assert len(gaps) >= 4
+    assert gaps[1] > gaps[0] * 1.5
+    assert gaps[2] > gaps[1] * 1.5
+    assert abs(gaps[3] - gaps[2]) < 0.15
+
+
+def test_window_waiters_kept_on_reload():
+    waiters = session._window_waiters
+    supervisor = session._supervisor
+    reloaded = importlib.reload(session)
+    # A WindowAppears check started before the reload is still resolved after it
+    assert reloaded._window_waiters is waiters
+    assert reloaded._supervisor is supervisor
+
+
+def test_check_is_abstract():
+    class NoWait(session.Check):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWait()
@@ -0,0 +1,79 @@
+"""
+Tests for ``ticker`` with a mocked clock and event loop.
+"""
+
+import time
+import types
+
+import pytest
+
+import ticker
+
+
+class FakeLoop:
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def call_later(self, delay, func):
+        timer = (self.now + delay, func)
+        self.timers.append(timer)
+        return timer
+
+    def fire(self, early=0.0):
+        # Run the next timer, early by that many seconds
+        self.timers.sort(key=lambda timer: timer[0])
+        when, func = self.timers.pop(0)
+        self.now = when - early
+        func()
+
+
+@pytest.fixture
+def loop(monkeypatch):
+    loop = FakeLoop()
+    monkeypatch.setattr(ticker, "asyncio", types.SimpleNamespace(get_running_loop=lambda: loop))
+    monkeypatch.setattr(
+        ticker,
+        "time",
+        types.SimpleNamespace(
+            time=lambda: loop.now,
+            localtime=lambda seconds=None: time.gmtime(loop.now if seconds is None else seconds),
+        ),
+    )
+    return loop
+
+
+def subscribe(loop):
+    minutes = []
+    days = []
+    t = ticker.Ticker()
+    t.subscribe(ticker.MINUTE, lambda: minutes.append(int(loop.now // 60)))
+    t.subscribe(ticker.DAY, lambda: days.append(int(loop.now // 86400)))
+    return minutes, days
+
+
+def test_ticks_on_minute_boundaries(loop):
+    loop.now = 86400 - 150.25
+    minutes, days = subscribe(loop)
+    for _ in range(3):
+        loop.fire()
+    assert minutes == [1438, 1439, 1440]
+    assert days == [1]
+
+
+def test_early_timer_waits_for_boundary(loop):
+    loop.now = 30.0
+    minutes, _ = subscribe(loop)
+    # Fires at 59.8 s
+    loop.fire(early=0.2)
+    assert minutes == []
+    loop.fire()
+    assert minutes == [1]
+    assert loop.timers[0][0] == 120.0
+
+
+def test_subscribing_just_before_boundary(loop):
+    loop.now = 59.8
+    minutes, _ = subscribe(loop)
+    loop.fire()
+    assert minutes == [1]
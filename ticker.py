@@ -0,0 +1,88 @@
+"""
+Ticker
+======
+
+A single timer, aligned to the wall clock's minute boundaries, that is shared by all
+of the clock widgets. Subscribers are called at every minute boundary, or only when
+the (local) date changes, so however many clocks there are there is only one wakeup a
+minute.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from libqtile.log_utils import logger
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+MINUTE = "minute"
+DAY = "day"
+
+# strftime directives that change more than once a minute or once a day
+_SECOND_DIRECTIVES = ("%S", "%T", "%X", "%c", "%s", "%f", "%r")
+_MINUTE_DIRECTIVES = ("%M", "%H", "%I", "%R", "%p", "%k", "%l")
+
+
+def unit_for_format(fmt: str) -> str | None:
+    """
+    The boundary at which a time format's output can change, or None if it changes
+    more often than once a minute.
+    """
+    if any(d in fmt for d in _SECOND_DIRECTIVES):
+        return None
+    if any(d in fmt for d in _MINUTE_DIRECTIVES):
+        return MINUTE
+    return DAY
+
+
+class Ticker:
+    def __init__(self):
+        self._subscribers: dict[str, list[Callable[[], None]]] = {MINUTE: [], DAY: []}
+        self._handle: asyncio.TimerHandle | None = None
+        self._day: int | None = None
+
+    def subscribe(self, unit: str, callback: Callable[[], None]) -> None:
+        self._subscribers[unit].append(callback)
+        if self._handle is None:
+            self._day = time.localtime().tm_yday
+            self._schedule()
+
+    def unsubscribe(self, unit: str, callback: Callable[[], None]) -> None:
+        if callback in self._subscribers[unit]:
+            self._subscribers[unit].remove(callback)
+        if self._handle is not None and not any(self._subscribers.values()):
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self) -> None:
+        delay = 60 - time.time() % 60
+        self._handle = asyncio.get_running_loop().call_later(delay, self._tick)
+
+    def _tick(self) -> None:
+        # Timers can fire slightly early, when the subscribers would show the minute
+        # that is ending, so wait for the boundary
+        delay = 60 - time.time() % 60
+        if delay < 0.5:
+            self._handle = asyncio.get_running_loop().call_later(delay, self._tick)
+            return
+
+        self._schedule()
+
+        callbacks = list(self._subscribers[MINUTE])
+        day = time.localtime(time.time() + 0.5).tm_yday
+        if day != self._day:
+            self._day = day
+            callbacks.extend(self._subscribers[DAY])
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Ticker subscriber %s failed", callback)
+
+
+ticker = Ticker()
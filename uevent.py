@@ -0,0 +1,84 @@
+"""
+Kernel uevents
+==============
+
+Listens for the kernel's uevents on a NETLINK_KOBJECT_UEVENT socket, which is read from
+the event loop, so that widgets can update when a device changes rather than polling
+sysfs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+from typing import TYPE_CHECKING
+
+from libqtile.log_utils import logger
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+NETLINK_KOBJECT_UEVENT = 15
+KERNEL_GROUP = 1
+
+
+def parse(data: bytes) -> dict[str, str]:
+    """Parse a kernel uevent, e.g. b"change@/devices/...\\0ACTION=change\\0..."."""
+    env = {}
+    for field in data.split(b"\0")[1:]:
+        key, sep, value = field.partition(b"=")
+        if sep:
+            env[key.decode(errors="replace")] = value.decode(errors="replace")
+    return env
+
+
+class UeventMonitor:
+    """Calls ``callback`` with the environment of each uevent from ``subsystem``."""
+
+    def __init__(self, subsystem: str, callback: Callable[[dict[str, str]], None]):
+        self.subsystem = subsystem
+        self.callback = callback
+        self._sock: socket.socket | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> None:
+        """
+        Open the socket and start reading from it, unless that has already been done.
+        Raises OSError on failure.
+        """
+        if self._sock is not None:
+            return
+        sock = socket.socket(
+            socket.AF_NETLINK,
+            socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+            NETLINK_KOBJECT_UEVENT,
+        )
+        try:
+            sock.bind((0, KERNEL_GROUP))
+        except OSError:
+            sock.close()
+            raise
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._read)
+        self._sock = sock
+
+    def _read(self) -> None:
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(8192)
+            except BlockingIOError:
+                return
+            except OSError:
+                logger.exception("Failed to read uevent")
+                return
+            env = parse(data)
+            if env.get("SUBSYSTEM") == self.subsystem:
+                self.callback(env)
+
+    def stop(self) -> None:
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
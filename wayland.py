@@ -4,15 +4,18 @@ Wayland-specific configuration
 
 import asyncio
 import os
-import subprocess
 
-from libqtile import hook, qtile
+from libqtile import qtile
 from libqtile.backend.wayland import InputConfig
 from libqtile.backend.wayland.xdgwindow import XdgWindow
 from libqtile.backend.wayland.xwindow import XWindow
 from libqtile.backend.wayland.layer import LayerStatic
 from libqtile.lazy import lazy
 
+import hooks
+import session
+from placement import place_window
+
 IS_XEPHYR = int(os.environ.get("QTILE_XEPHYR", 0))
 mod = "mod1" if IS_XEPHYR else "mod4"
 
@@ -63,8 +66,8 @@ wl_shadows = {
 }
 
 
-@hook.subscribe.client_new
-def _(win):
+@hooks.subscribe.client_new
+def _float_small_windows(win):
     # Auto-float some windows
     if isinstance(win, XdgWindow):
         max_width = win.surface.toplevel._ptr.current.max_width
@@ -77,48 +80,16 @@ def _(win):
                 win.floating = True
 
 
-@hook.subscribe.client_managed
-async def _(win):
-    # Some other miscellaneous rules
-    if win.name == "Firefox — Sharing Indicator":
-        win.place(win.x + win.borderwidth, 0, win.width, win.height, 0, None)
-        return
-
-    wm_class = win.get_wm_class() or []
-    if win.name == "Navigator" and "libreoffice-startcenter" in wm_class:
-        x = qtile.current_screen.x
-        win.place(x, 240, 450, 600, win.borderwidth, win.bordercolor)
-        return
-
-    if "mpv" in wm_class:
-        # Resizing mpv if it's sized itself too big to fit on screen
-        sw = qtile.current_screen.width
-        sh = qtile.current_screen.height
-        x = y = w = h = None
-        if win.height > sh:
-            h = sh
-            y = qtile.current_screen.y
-        if win.width > sw:
-            w = sw
-            x = qtile.current_screen.x
-        if w is not None or h is not None:
-            if h is None:
-                h = win.height
-                y = win.y
-            else:
-                w = win.width
-                x = win.x
-            bw = win.borderwidth
-            win.place(x - bw, y - bw, w + 2 * bw, h + 2 * bw, 0, None)
-        return
-
-
-@hook.subscribe.startup_once
-async def _():
-    # Run a startup script
-    HOME = os.path.expanduser("~")
-    p = subprocess.Popen(f"{HOME}/.config/qtile/startup.sh")
-    hook.subscribe.shutdown(p.terminate)
+@hooks.subscribe.client_managed
+def _place_windows(win):
+    # Some other miscellaneous rules, see placement.py
+    place_window(win, qtile.current_screen)
+
+
+@hooks.subscribe.startup_once
+def _start_session():
+    # Start the rest of the session, see session.py
+    session.start()
 
 
 ## I don't use this monitor, but keep this around for testing
@@ -4,9 +4,12 @@ X11-specific configuration
 
 import os
 
-from libqtile import hook, qtile
+from libqtile import qtile
 from libqtile.lazy import lazy
 
+import hooks
+import x11_properties
+
 IS_XEPHYR = int(os.environ.get("QTILE_XEPHYR", 0))
 mod = "mod1" if IS_XEPHYR else "mod4"
 
@@ -34,9 +37,13 @@ keys_backend.extend(
 )
 
 
+# Read new windows' properties in one round trip, see x11_properties.py
+x11_properties.install()
+
+
 # Auto-float some windows
-@hook.subscribe.client_new
-def _(window):
+@hooks.subscribe.client_new
+def _new_window(window):
     if window.window.get_wm_type() == "desktop":
         window.static(qtile.current_screen.index)
         return
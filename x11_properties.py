@@ -0,0 +1,227 @@
+"""
+X11 property prefetching
+========================
+
+When a window is mapped, Qtile and the config read a dozen or so of its properties:
+its name, class, role, type, hints, protocols and so on. Each read is a separate
+``GetProperty`` request that waits for its reply before the next is sent, so each is a
+round trip to the X server.
+
+Here, when a ``MapRequest`` arrives for a new window, the requests for all of those
+properties are sent at once and their replies are collected together, in one round
+trip. The replies are cached on the window's ``XWindow`` and ``XWindow.get_property``
+reads from that cache, so Qtile's own property getters, the float rules, group matches
+and the ``client_new`` hooks all use it without any changes. A property's cached reply
+is dropped when a ``PropertyNotify`` arrives for it, and the next read fetches it again.
+
+How long each prefetch took, and how many reads were then served from the cache, is
+logged at debug level.
+
+Running this file directly connects to ``$DISPLAY``, e.g. a Xephyr started with
+``QTILE_XEPHYR``, and times reading the properties of each top-level window one at a
+time and batched:
+
+    python x11_properties.py [repeat]
+
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import xcffib
+import xcffib.xproto
+from libqtile import qtile
+from libqtile.backend.x11.window import XWindow
+from libqtile.backend.x11.xcbq import PropertyMap
+from libqtile.log_utils import logger
+
+import hooks
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+
+# GetPropertyType.Any
+ANY = 0
+
+# (property, type) pairs read while a window is being managed, as passed by Qtile's
+# XWindow getters. Reads with a different type aren't cached.
+PROPERTIES: list[tuple[str, str | int]] = [
+    ("QTILE_INTERNAL", "CARDINAL"),
+    ("_NET_WM_VISIBLE_NAME", ANY),
+    ("_NET_WM_NAME", ANY),
+    ("WM_NAME", ANY),
+    ("WM_CLASS", "STRING"),
+    ("WM_WINDOW_ROLE", "STRING"),
+    ("_NET_WM_WINDOW_TYPE", "ATOM"),
+    ("WM_HINTS", ANY),
+    ("WM_NORMAL_HINTS", ANY),
+    ("WM_TRANSIENT_FOR", "WINDOW"),
+    ("WM_PROTOCOLS", "ATOM"),
+    ("_NET_WM_STATE", "ATOM"),
+    ("_NET_WM_PID", "CARDINAL"),
+    ("_NET_WM_DESKTOP", "CARDINAL"),
+]
+
+_CACHED = frozenset(PROPERTIES)
+
+# Window ID -> prefetched replies, until the window's XWindow first reads a property
+_pending: dict[int, dict[tuple[str, str | int], Any]] = {}
+
+
+def fetch(conn: Any, atoms: Callable[[str], int], wid: int, properties: list) -> dict:
+    """
+    Send GetProperty requests for all of a window's properties and then collect the
+    replies. A property whose request failed, e.g. because the window has gone, gets
+    None.
+    """
+    cookies = []
+    for prop, type_ in properties:
+        type_atom = atoms(type_) if isinstance(type_, str) else type_
+        cookies.append(
+            ((prop, type_), conn.core.GetProperty(False, wid, atoms(prop), type_atom, 0, 2**32 - 1))
+        )
+
+    replies = {}
+    for key, cookie in cookies:
+        try:
+            replies[key] = cookie.reply()
+        except (xcffib.xproto.WindowError, xcffib.xproto.AccessError, xcffib.ConnectionException):
+            replies[key] = None
+    return replies
+
+
+def _unpack(reply: Any, unpack: type | None) -> Any:
+    # What XWindow.get_property returns for a reply
+    if reply is None or not reply.value_len:
+        return [] if unpack else None
+    if unpack is int:
+        return reply.value.to_atoms()
+    if unpack is str:
+        return reply.value.to_string()
+    return reply
+
+
+def _get_property(self, prop, type=None, unpack=None):
+    if type is None and prop in PropertyMap:
+        type = PropertyMap[prop][0]
+    key = (prop, type)
+    if key not in _CACHED:
+        return self._uncached_get_property(prop, type, unpack)
+
+    cache = self.__dict__.get("_properties")
+    if cache is None:
+        cache = self._properties = _pending.pop(self.wid, None) or {}
+        self._property_reads = [0, 0]
+
+    if key in cache:
+        self._property_reads[0] += 1
+        return _unpack(cache[key], unpack)
+
+    self._property_reads[1] += 1
+    reply = cache[key] = self._uncached_get_property(prop, type, None)
+    return _unpack(reply, unpack)
+
+
+def _prefetch(wid: int) -> None:
+    conn = qtile.core.conn
+    t = time.monotonic()
+    # Replaced if the window is mapped again before it is managed, and dropped when it
+    # is destroyed
+    _pending[wid] = fetch(conn.conn, conn.atoms.__getitem__, wid, PROPERTIES)
+    logger.debug(
+        "Prefetched %d properties for window %#x in %.2f ms",
+        len(PROPERTIES),
+        wid,
+        (time.monotonic() - t) * 1000,
+    )
+
+
+def _invalidate(wid: int, atom: int) -> None:
+    win = qtile.windows_map.get(wid)
+    cache = getattr(getattr(win, "window", None), "_properties", None)
+    if not cache:
+        return
+    name = qtile.core.conn.atoms.get_name(atom)
+    for key in [key for key in cache if key[0] == name]:
+        del cache[key]
+
+
+def _get_target_chain(event_type: str, event: Any) -> list:
+    # Called by the X11 core for each event before it is handled
+    if event_type == "MapRequest" and event.window not in qtile.windows_map:
+        _prefetch(event.window)
+    elif event_type == "PropertyNotify":
+        _invalidate(event.window, event.atom)
+    elif event_type == "DestroyNotify":
+        _pending.pop(event.window, None)
+    return type(qtile.core)._get_target_chain(qtile.core, event_type, event)
+
+
+def _log_reads(window: Any) -> None:
+    reads = getattr(window.window, "_property_reads", None)
+    if reads:
+        logger.debug(
+            "Read properties of %s: %d from the cache, %d fetched", window.name, *reads
+        )
+
+
+def install() -> None:
+    """Prefetch and cache window properties. Can be called again after a reload."""
+    if not hasattr(XWindow, "_uncached_get_property"):
+        XWindow._uncached_get_property = XWindow.get_property
+    XWindow.get_property = _get_property
+    qtile.core._get_target_chain = _get_target_chain
+    hooks.subscribe.client_managed(_log_reads)
+
+
+def benchmark(repeat: int = 100) -> tuple[int, float, float]:
+    """
+    Read the properties of each top-level window on ``$DISPLAY``, one request at a
+    time and batched. Returns the number of windows and the time taken by each, in
+    seconds.
+    """
+    from timeit import timeit
+
+    conn = xcffib.connect()
+    root = conn.get_setup().roots[conn.pref_screen].root
+    windows = conn.core.QueryTree(root).reply().children
+    names = {name for pair in PROPERTIES for name in pair if isinstance(name, str)}
+    atoms = {name: conn.core.InternAtom(False, len(name), name) for name in names}
+    atoms = {name: cookie.reply().atom for name, cookie in atoms.items()}
+
+    def one_at_a_time():
+        for wid in windows:
+            for prop in PROPERTIES:
+                fetch(conn, atoms.__getitem__, wid, [prop])
+
+    def batched():
+        for wid in windows:
+            fetch(conn, atoms.__getitem__, wid, PROPERTIES)
+
+    def value(reply):
+        reply = _unpack(reply, None)
+        return None if reply is None else reply.value.buf()
+
+    for wid in windows:
+        expected = fetch(conn, atoms.__getitem__, wid, PROPERTIES)
+        for prop in PROPERTIES:
+            reply = fetch(conn, atoms.__getitem__, wid, [prop])[prop]
+            assert value(reply) == value(expected[prop]), f"Replies differ for {prop} of {wid:#x}"
+
+    sequential = timeit(one_at_a_time, number=repeat)
+    batch = timeit(batched, number=repeat)
+    conn.disconnect()
+    return len(windows), sequential, batch
+
+
+if __name__ == "__main__":
+    import sys
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    count, sequential, batch = benchmark(repeat)
+    print(f"{count} windows, {len(PROPERTIES)} properties each, {repeat} times")
+    print(f"One at a time: {sequential * 1000:.2f} ms")
+    print(f"Batched:       {batch * 1000:.2f} ms ({sequential / batch:.1f}x)")